@@ -0,0 +1,161 @@
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from position import decode, from_string, read_records, to_string
+from tournament import DEFAULT_ENGINE, make_player
+
+# Jugadores de cada proceso de análisis, uno por bando, reutilizados entre posiciones
+_players = {}
+
+
+def _player(spec, side, budget):
+    # Devuelve el jugador del bando con el presupuesto por posición
+    player = _players.get(side)
+    if player is None:
+        player = _players[side] = make_player(spec, side, budget, 0)
+    player.max_time = budget
+    manager = getattr(player, "time_manager", None)
+    if manager is not None:
+        manager.max_time = budget
+    return player
+
+
+def analyse_position(item, mode, budget, spec):
+    # Analiza una posición (índice, registro binario o texto) y devuelve su resultado
+    index, record = item
+    result = {"index": index}
+    try:
+        if isinstance(record, str):
+            board, side = from_string(record)
+            result["position"] = record
+        else:
+            board, side = decode(record)
+            result["position"] = to_string(board, side)
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+    result["to_move"] = side
+    for player_id in (1, 2):
+        if board.check_connection(player_id):
+            result["winner"] = player_id
+            return result
+    player = _player(spec, side, budget)
+    start = time.perf_counter()
+    try:
+        if mode == "evaluate":
+            # Evaluación estática desde el punto de vista del que mueve
+            result["score"] = player.evaluate_position(board)
+        else:
+            move = player.play(board)
+            result["move"] = [int(move[0]), int(move[1])]
+            # Puntuación, profundidad y nodos solo si la jugada salió de la búsqueda; con
+            # libro, resolvedor, apertura o simetría serían los de la búsqueda anterior. Sin
+            # ninguna profundidad completa tampoco hay puntuación
+            searched = getattr(player, "move_source", "search") == "search"
+            completed = searched and getattr(player, "depth_reached", 0)
+            result["score"] = getattr(player, "best_score", None) if completed else None
+            result["depth"] = getattr(player, "depth_reached", None) if searched else None
+            result["nodes"] = getattr(player, "nodes", None) if searched else None
+            result["source"] = getattr(player, "move_source", None)
+    except Exception as error:
+        _players.pop(side, None)
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _analyse_chunk(task):
+    # Analiza en un proceso un bloque de posiciones
+    mode, budget, spec, items = task
+    return [analyse_position(item, mode, budget, spec) for item in items]
+
+
+def _chunks(iterable, length):
+    # Agrupa un iterable en listas de como mucho length elementos sin leerlo entero
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == length:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyse(records, mode="search", budget=0.5, workers=1, chunk=16, window=None, spec=None):
+    # Analiza un iterable de posiciones (registros binarios o texto) y produce los resultados
+    # en el orden de entrada según se completan. Como mucho hay window bloques en vuelo, así
+    # que la memoria no depende del tamaño de la entrada
+    spec = spec or {"factory": DEFAULT_ENGINE}
+    # Las posiciones se reparten entre procesos; cada jugador busca en uno solo
+    spec = {"factory": spec["factory"], "options": dict(spec.get("options", {}), workers=1, ponder=False)}
+    chunks = _chunks(enumerate(records), chunk)
+    if workers <= 1:
+        for items in chunks:
+            yield from _analyse_chunk((mode, budget, spec, items))
+        return
+    window = window or 2 * workers
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        for items in chunks:
+            pending.append(pool.submit(_analyse_chunk, (mode, budget, spec, items)))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _read_text(stream):
+    # Una posición en texto por línea; las líneas vacías se ignoran
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def main(argv=None):
+    # Línea de órdenes: analiza un fichero de posiciones y escribe una línea JSON por posición
+    parser = argparse.ArgumentParser(description="Análisis por lotes de posiciones de Hex")
+    parser.add_argument("input", help="fichero de posiciones ('-' para la entrada estándar)")
+    parser.add_argument("--output", help="fichero de resultados (por defecto, la salida estándar)")
+    parser.add_argument("--format", choices=("text", "binary"),
+                        help="texto (una posición por línea) o registros binarios concatenados; "
+                             "por defecto, binario si el fichero termina en .bin")
+    parser.add_argument("--mode", choices=("search", "evaluate"), default="search",
+                        help="jugada con búsqueda o evaluación estática del que mueve")
+    parser.add_argument("--time", type=float, default=0.5, help="max_time por posición")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk", type=int, default=16, help="posiciones por bloque enviado a un proceso")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, help="módulo:Clase del motor")
+    parser.add_argument("--options", help="opciones JSON del motor (argumentos o atributos)")
+    args = parser.parse_args(argv)
+
+    binary = args.format == "binary" or (args.format is None and args.input.endswith(".bin"))
+    if args.input == "-":
+        source = sys.stdin.buffer if binary else sys.stdin
+    else:
+        source = open(args.input, "rb" if binary else "r")
+    output = open(args.output, "w") if args.output else sys.stdout
+    spec = {"factory": args.engine, "options": json.loads(args.options) if args.options else {}}
+    try:
+        records = read_records(source) if binary else _read_text(source)
+        for result in analyse(records, args.mode, args.time, args.workers, args.chunk, spec=spec):
+            output.write(json.dumps(result, separators=(",", ":")) + "\n")
+            output.flush()
+    finally:
+        if source is not sys.stdin and source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from concurrent.futures import ProcessPoolExecutor
+
+from player import HexBoard, HexPlayer
+
+# Tamaños y fases del corpus: fracción del tablero ocupada en cada fase
+SIZES = (6, 8, 11, 13, 19)
+PHASES = (("opening", 0.1), ("middle", 0.3), ("late", 0.5))
+
+# Tamaños de la prueba de escala, hasta el máximo que debe soportar el jugador
+SCALING_SIZES = (11, 13, 19, 23, 26)
+
+# Métricas donde un valor mayor es mejor; en el resto (tiempos) es mejor el menor
+HIGHER_IS_BETTER = ("nps",)
+
+
+def make_position(size, fill, seed):
+    # Posición reproducible: jugadas alternas al azar con semilla, sin ganador todavía
+    rng = random.Random(seed)
+    while True:
+        board = HexBoard(size)
+        player_id = 1
+        for _ in range(int(size * size * fill)):
+            board.place_piece(*rng.choice(board.get_possible_moves()), player_id)
+            player_id = 3 - player_id
+        if not board.check_connection(1) and not board.check_connection(2):
+            board._moves = []
+            board._trail = []
+            return board
+
+
+def corpus(sizes=SIZES):
+    # Corpus fijo de posiciones por tamaño y fase: {(tamaño, fase): tablero}
+    return {
+        (size, phase): make_position(size, fill, size * 100 + index)
+        for size in sizes
+        for index, (phase, fill) in enumerate(PHASES)
+    }
+
+
+def time_call(function, min_time=0.2, rounds=5):
+    # Segundos por llamada: tras una llamada de calentamiento se calibra el número de
+    # repeticiones y se toma la mejor ronda, que es la menos afectada por el ruido
+    function()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / rounds or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def _fresh_player(board, player_id=1, max_time=10):
+    # Jugador sin libro, simetría ni memorias previas, para medir siempre lo mismo
+    player = HexPlayer(player_id, max_time=max_time)
+    player.use_symmetry = False
+    player.book = None
+    player.opening_book = {}
+    player.orderer.new_search(board.size)
+    player.candidates.new_search(board.size)
+    player.time_manager.begin_move(board.empty_count())
+    return player
+
+
+def micro_benchmarks(board, min_time):
+    # Tiempo por llamada de las funciones calientes sobre una posición
+    player = _fresh_player(board)
+    size = board.size
+    pid = player.player_id
+    groups = player.identify_groups(board, pid)
+    opponent_groups = player.identify_groups(board, player.opponent_id)
+    move = next(iter(board._empty))
+
+    def candidates():
+        # Posición sin estado previo: cálculo completo de los motivos
+        player.candidates._positions.clear()
+        player.candidates._path.clear()
+        player.generate_candidate_moves(board)
+
+    def child_candidates():
+        # Hija de una posición con estado: solo se recalcula la zona que toca la jugada
+        generator = player.candidates
+        generator.set_root(board, pid)
+        del generator._path[len(board._moves) + 1:]
+        generator._positions.clear()
+        board.place_piece(move // size, move % size, player.opponent_id)
+        player.generate_candidate_moves(board, None, pid)
+        board.undo()
+
+    def place_undo():
+        board.place_piece(move // size, move % size, pid)
+        board.undo()
+
+    return {
+        # Sin la caché de evaluaciones, que convertiría las repeticiones en aciertos
+        "evaluate_board": time_call(lambda: player.evaluate_position(board), min_time),
+        "identify_groups": time_call(lambda: player.identify_groups(board, pid), min_time),
+        "shortest_path_length": time_call(
+            lambda: player.shortest_path_length(board, 0, 0, size - 1, size - 1, pid), min_time),
+        "find_virtual_connections": time_call(
+            lambda: player.find_virtual_connections(board, opponent_groups, player.opponent_id), min_time),
+        "calculate_winning_potential": time_call(
+            lambda: player.calculate_winning_potential(board, groups, pid), min_time),
+        "static_move_scores": time_call(lambda: player.static_move_scores(board), min_time),
+        "generate_candidate_moves": time_call(candidates, min_time),
+        "generate_candidate_child": time_call(child_candidates, min_time),
+        "place_undo": time_call(place_undo, min_time),
+    }
+
+
+def search_benchmarks(board, move_time):
+    # Nodos por segundo de la búsqueda y tiempo hasta devolver la jugada en play()
+    player = _fresh_player(board, max_time=move_time)
+    player.solver_threshold = 0
+    start = time.perf_counter()
+    player.play(board)
+    elapsed = time.perf_counter() - start
+    nps = player.nodes / elapsed if elapsed > 0 else 0.0
+
+    # La latencia se mide con la configuración por defecto (resolvedor incluido)
+    player = _fresh_player(board, max_time=move_time)
+    start = time.perf_counter()
+    player.play(board)
+    latency = time.perf_counter() - start
+    return {"nps": nps, "play_seconds": latency, "depth": player.depth_reached}
+
+
+def _peak_memory_mb():
+    # Memoria residente máxima del proceso en MB (None donde no hay módulo resource)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux da KB y macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def scaling_benchmark(size, move_time):
+    # Tiempo hasta la jugada, profundidad y memoria máxima de play() en las tres fases de
+    # un tamaño; se ejecuta en un proceso nuevo para que la memoria sea solo la de ese tamaño
+    baseline = _peak_memory_mb()
+    times = []
+    depths = []
+    for index, (phase, fill) in enumerate(PHASES):
+        board = make_position(size, fill, size * 100 + index)
+        player = _fresh_player(board, max_time=move_time)
+        start = time.perf_counter()
+        player.play(board)
+        times.append(time.perf_counter() - start)
+        depths.append(player.depth_reached)
+    peak = _peak_memory_mb()
+    return {
+        "empty": size * size,
+        "play_seconds": sum(times) / len(times),
+        "max_play_seconds": max(times),
+        "depth": min(depths),
+        "peak_mb": peak,
+        "engine_mb": peak - baseline if peak is not None else None,
+    }
+
+
+def run(sizes=SIZES, min_time=0.2, move_time=1.0, search=True, scaling_sizes=(), log=None):
+    # Ejecuta todo el conjunto y devuelve el resultado como diccionario serializable
+    results = {}
+    for (size, phase), board in corpus(sizes).items():
+        name = f"{size}/{phase}"
+        entry = {"empty": board.empty_count()}
+        entry.update(micro_benchmarks(board, min_time))
+        if search:
+            entry.update(search_benchmarks(board, move_time))
+        results[name] = entry
+        if log is not None:
+            log(f"{name}: " + ", ".join(f"{key}={value:.3g}" for key, value in entry.items()))
+    for size in scaling_sizes:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            entry = pool.submit(scaling_benchmark, size, move_time).result()
+        name = f"{size}/scaling"
+        results[name] = entry
+        if log is not None:
+            log(f"{name}: " + ", ".join(f"{key}={value:.3g}" for key, value in entry.items()
+                                        if value is not None))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "move_time": move_time,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    # Lista de regresiones: métricas que empeoran más que el umbral relativo
+    regressions = []
+    for name, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(name)
+        if old_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if metric in ("empty", "depth", "peak_mb") or not old:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                change = (old - value) / old
+            else:
+                change = (value - old) / old
+            if change > threshold:
+                regressions.append((name, metric, old, value, change))
+    return regressions
+
+
+def main(argv=None):
+    # Línea de órdenes: mide, guarda el JSON y compara con una referencia
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento de HexPlayer")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="tiempo mínimo de medida por función, en segundos")
+    parser.add_argument("--move-time", type=float, default=1.0,
+                        help="max_time de las jugadas medidas con play()")
+    parser.add_argument("--no-search", action="store_true", help="solo micro-benchmarks")
+    parser.add_argument("--scaling", type=int, nargs="*", metavar="SIZE",
+                        help="añade la prueba de escala (por defecto, tamaños 11 a 26)")
+    parser.add_argument("--output", help="fichero JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument("--baseline", help="JSON de referencia con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="empeoramiento relativo que se considera regresión")
+    args = parser.parse_args(argv)
+
+    log = lambda line: print(line, file=sys.stderr, flush=True)
+    scaling_sizes = () if args.scaling is None else (args.scaling or SCALING_SIZES)
+    current = run(args.sizes, args.min_time, args.move_time, not args.no_search, scaling_sizes, log)
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(current, baseline, args.threshold)
+        for name, metric, old, value, change in regressions:
+            log(f"REGRESIÓN {name} {metric}: {old:.3g} -> {value:.3g} ({change:+.0%})")
+        if regressions:
+            return 1
+        log("sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+
+from player import HexBoard, HexPlayer, SIDE_KEY, zobrist_table
+
+# Fichero por defecto del libro, junto a este módulo
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+# Cabecera: firma, versión y número de entradas
+_MAGIC = b"HEXBOOK1"
+_HEADER = struct.Struct("<8sII")
+# Entrada: clave canónica, tamaño del tablero, casilla (índice plano) y puntuación
+_ENTRY = struct.Struct("<QHHh")
+
+
+def _transforms(size):
+    # Simetrías del Hex: (aplicación de casilla, intercambia colores)
+    last = size - 1
+    return (
+        (lambda r, c: (r, c), False),
+        (lambda r, c: (last - r, last - c), False),
+        (lambda r, c: (c, r), True),
+        (lambda r, c: (last - c, last - r), True),
+    )
+
+
+def canonical_key(size, stones, player_id):
+    # Clave mínima entre las posiciones simétricas, con el jugador que mueve incluido;
+    # devuelve (clave, índice de la transformación usada)
+    keys = zobrist_table(size)
+    best = None
+    for index, (transform, swap) in enumerate(_transforms(size)):
+        key = 0
+        for owner in (1, 2):
+            colour = 3 - owner if swap else owner
+            mask = stones[owner]
+            while mask:
+                low = mask & -mask
+                r, c = divmod(low.bit_length() - 1, size)
+                tr, tc = transform(r, c)
+                key ^= keys[colour][tr * size + tc]
+                mask ^= low
+        mover = 3 - player_id if swap else player_id
+        if mover == 1:
+            key ^= SIDE_KEY
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best
+
+
+class OpeningBook:
+    _open_books = {}
+
+    @classmethod
+    def open(cls, path=None):
+        # Abre el libro una sola vez por proceso; sin fichero se obtiene un libro vacío
+        path = path or DEFAULT_PATH
+        book = cls._open_books.get(path)
+        if book is None:
+            book = cls._open_books[path] = cls(path)
+        return book
+
+    def __init__(self, path):
+        # Proyecta el fichero en memoria; las búsquedas no lo leen entero
+        self.path = path
+        self.count = 0
+        self._map = None
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size < _HEADER.size:
+                return
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != 1:
+            raise ValueError(f"{path} no es un libro de aperturas válido")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        # Lee la entrada i del fichero proyectado
+        return _ENTRY.unpack_from(self._map, _HEADER.size + i * _ENTRY.size)
+
+    def probe(self, size, stones, player_id):
+        # Devuelve (casilla, puntuación) en el sistema del tablero dado, o None
+        if not self.count:
+            return None
+        key, index = canonical_key(size, stones, player_id)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count:
+            entry_key, entry_size, move, score = self._entry(lo)
+            if entry_key != key:
+                return None
+            if entry_size == size:
+                # Las cuatro simetrías son involuciones: se deshace con la misma
+                transform = _transforms(size)[index][0]
+                return transform(*divmod(move, size)), score
+            lo += 1
+        return None
+
+    @staticmethod
+    def probe_entries(entries, size, stones, player_id):
+        # Como probe, pero sobre un diccionario de entradas en memoria
+        key, index = canonical_key(size, stones, player_id)
+        found = entries.get((key, size))
+        if found is None:
+            return None
+        return _transforms(size)[index][0](*divmod(found[0], size))
+
+    def lookup(self, board, player_id):
+        # Jugada del libro para el tablero, o None si la posición no está o está ocupada
+        found = self.probe(board.size, board.stones, player_id)
+        if found is None:
+            return None
+        (r, c), _ = found
+        if board.board[r][c] != 0:
+            return None
+        return (r, c)
+
+    def close(self):
+        # Libera la proyección del fichero
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self.count = 0
+        OpeningBook._open_books.pop(self.path, None)
+
+
+def write_book(path, entries):
+    # Escribe {(clave, tamaño): (casilla, puntuación)} ordenado por clave
+    items = sorted(entries.items())
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(_HEADER.pack(_MAGIC, 1, len(items)))
+        for (key, size), (move, score) in items:
+            handle.write(_ENTRY.pack(key, size, move, max(-32768, min(32767, int(score)))))
+    os.replace(path + ".tmp", path)
+
+
+def read_book(path):
+    # Lee todas las entradas de un libro existente
+    book = OpeningBook(path)
+    entries = {}
+    for i in range(book.count):
+        key, size, move, score = book._entry(i)
+        entries[(key, size)] = (move, score)
+    if book._map is not None:
+        book._map.close()
+    return entries
+
+
+def build_book(size, plies, width, max_time, path, log=None):
+    # Recorre las posiciones hasta `plies` piezas con búsquedas profundas: en cada una
+    # guarda la mejor jugada y expande las `width` mejores; las simetrías no se repiten
+    entries = read_book(path) if os.path.exists(path) else {}
+    searchers = {}
+    for player_id in (1, 2):
+        searcher = searchers[player_id] = HexPlayer(player_id, max_time=max_time)
+        searcher.use_symmetry = False
+        searcher.book = None
+        searcher.opening_book = {}
+    frontier = [HexBoard(size)]
+    seen = set()
+    for ply in range(plies):
+        player_id = 1 if ply % 2 == 0 else 2
+        next_frontier = []
+        for board in frontier:
+            key, index = canonical_key(size, board.stones, player_id)
+            key = (key, size)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in entries:
+                # Posición de una construcción anterior: solo se sigue su jugada
+                probe = OpeningBook.probe_entries(entries, size, board.stones, player_id)
+                ranked = [probe] if probe is not None and board.board[probe[0]][probe[1]] == 0 else []
+            else:
+                searcher = searchers[player_id]
+                start = time.time()
+                move = searcher.play(board)
+                ranked = [move] + [m for m in searcher.root_moves if m != move]
+                # La jugada se guarda en el sistema de la posición canónica
+                stored = _transforms(size)[index][0](*move)
+                # Sin puntuación (resolvedor, atajos o búsqueda sin profundidad completa) se guarda 0
+                score = searcher.best_score if searcher.best_score is not None else 0
+                entries[key] = (stored[0] * size + stored[1], score)
+                if log is not None:
+                    log(f"ply {ply} {move} score {searcher.best_score} "
+                        f"depth {searcher.depth_reached} {time.time() - start:.1f}s")
+            for reply in ranked[:width]:
+                child = board.clone()
+                child.place_piece(reply[0], reply[1], player_id)
+                next_frontier.append(child)
+        frontier = next_frontier
+        write_book(path, entries)
+    return len(entries)
+
+
+def main(argv=None):
+    # Línea de órdenes: construye el libro o muestra cuántas posiciones tiene
+    parser = argparse.ArgumentParser(description="Libro de aperturas de Hex")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="genera el libro con búsquedas profundas")
+    build.add_argument("--size", type=int, default=11)
+    build.add_argument("--plies", type=int, default=10)
+    build.add_argument("--width", type=int, default=2)
+    build.add_argument("--time", type=float, default=30.0)
+    build.add_argument("--out", default=DEFAULT_PATH)
+    show = commands.add_parser("show", help="muestra el número de entradas del libro")
+    show.add_argument("--path", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        total = build_book(args.size, args.plies, args.width, args.time, args.out,
+                           log=lambda line: print(line, flush=True))
+        print(f"{total} posiciones en {args.out}")
+    else:
+        print(f"{len(OpeningBook(args.path))} posiciones en {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# Bordes que toca un grupo, como banderas de bits
+TOP, BOTTOM, LEFT, RIGHT = 1, 2, 4, 8
+
+# Par de bordes que tiene que unir cada jugador
+GOAL_EDGES = (0, LEFT | RIGHT, TOP | BOTTOM)
+
+# Desplazamientos (fila, columna) de las seis vecinas de una casilla
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1))
+_DIRECTION_SET = frozenset(DIRECTIONS)
+
+
+class Geometry:
+    _geometries = {}
+
+    @classmethod
+    def for_size(cls, size: int):
+        # Devuelve la geometría del tamaño dado, creándola una sola vez
+        geometry = cls._geometries.get(size)
+        if geometry is None:
+            geometry = cls._geometries[size] = cls(size)
+        return geometry
+
+    def __init__(self, size: int):
+        # Precalcula en índice plano todo lo que depende solo del tamaño del tablero
+        self.size = size
+        n = self.n = size * size
+        self.coords = tuple(divmod(idx, size) for idx in range(n))
+        # Vecinas de cada casilla, como tupla de índices y como máscara de bits
+        self.neighbors = tuple(
+            tuple((r + dr) * size + c + dc for dr, dc in DIRECTIONS
+                  if 0 <= r + dr < size and 0 <= c + dc < size)
+            for r, c in self.coords
+        )
+        self.masks = tuple(sum(1 << nb for nb in nbs) for nbs in self.neighbors)
+        # Bordes que toca cada casilla y su distancia a cada borde
+        last = size - 1
+        self.flags = tuple(
+            (TOP if r == 0 else 0) | (BOTTOM if r == last else 0)
+            | (LEFT if c == 0 else 0) | (RIGHT if c == last else 0)
+            for r, c in self.coords
+        )
+        self.edge_distance = {
+            TOP: tuple(r for r, _ in self.coords),
+            BOTTOM: tuple(last - r for r, _ in self.coords),
+            LEFT: tuple(c for _, c in self.coords),
+            RIGHT: tuple(last - c for _, c in self.coords),
+        }
+        # Líneas de partida (False) y objetivo (True) de cada jugador
+        self.edge_lines = {}
+        for target in (False, True):
+            line = last if target else 0
+            self.edge_lines[1, target] = range(line, n, size)
+            self.edge_lines[2, target] = range(line * size, line * size + size)
+        self.bridges = self._build_bridges()
+
+    def _build_bridges(self):
+        # Puentes de cada casilla: (pareja, máscara del portador, portador 1, portador 2)
+        neighbors = self.neighbors
+        bridges = []
+        for idx in range(self.n):
+            near = set(neighbors[idx])
+            found = []
+            for mid in neighbors[idx]:
+                for partner in neighbors[mid]:
+                    if partner == idx or partner in near or partner in (f[0] for f in found):
+                        continue
+                    common = sorted(near.intersection(neighbors[partner]))
+                    if len(common) == 2:
+                        found.append((partner, (1 << common[0]) | (1 << common[1]),
+                                      common[0], common[1]))
+            bridges.append(tuple(found))
+        return tuple(bridges)
+
+    def dilate(self, mask):
+        # Vecinas de todas las casillas de una máscara
+        masks = self.masks
+        result = 0
+        while mask:
+            low = mask & -mask
+            result |= masks[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+    def cells_mask(self, cells):
+        # Máscara de bits de una colección de casillas (fila, columna)
+        size = self.size
+        mask = 0
+        for r, c in cells:
+            mask |= 1 << (r * size + c)
+        return mask
+
+
+def neighbor_table(size: int):
+    # Devuelve, para cada casilla en índice plano, la tupla de índices de sus vecinas
+    return Geometry.for_size(size).neighbors
+
+
+def neighbor_masks(size: int):
+    # Devuelve, para cada casilla, la máscara de bits de sus vecinas
+    return Geometry.for_size(size).masks
+
+
+def edge_flags(size: int):
+    # Devuelve, para cada casilla, las banderas de los bordes que toca
+    return Geometry.for_size(size).flags
+
+
+def edge_cells(size: int, player_id: int, target_edge: bool):
+    # Índices planos del borde de partida (izquierdo/superior) u objetivo de un jugador
+    return Geometry.for_size(size).edge_lines[player_id, target_edge]
+
+
+def bits_to_cells(mask: int, size: int):
+    # Convierte una máscara de bits en la lista de casillas (fila, columna)
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(divmod(low.bit_length() - 1, size))
+        mask ^= low
+    return cells
+
+
+def adjacent(pos1, pos2):
+    # Comprueba si dos casillas (fila, columna) son vecinas, sin depender del tamaño
+    return (pos2[0] - pos1[0], pos2[1] - pos1[1]) in _DIRECTION_SET
@@ -0,0 +1,172 @@
+from geometry import neighbor_table
+
+# Las seis vecinas de una casilla en orden circular: dos consecutivas son vecinas entre sí
+_RING = ((-1, 0), (-1, 1), (0, 1), (1, 0), (1, -1), (0, -1))
+
+
+def _run(mask, start, length):
+    # Comprueba si las posiciones start..start+length-1 del anillo están en la máscara
+    return all(mask >> ((start + i) % 6) & 1 for i in range(length))
+
+
+def _dead_ring(own, other):
+    # Patrones de casilla muerta: cuatro vecinas seguidas de un color, o tres seguidas
+    # de un color y dos seguidas del otro entre las tres restantes
+    for start in range(6):
+        if _run(own, start, 4):
+            return True
+        if _run(own, start, 3) and (_run(other, start + 3, 2) or _run(other, start + 4, 2)):
+            return True
+    return False
+
+
+def _dead_table():
+    # Tabla de 4096 entradas indexada por (anillo del jugador 1 << 6) | anillo del jugador 2
+    table = bytearray(1 << 12)
+    for first in range(64):
+        for second in range(64):
+            if not first & second:
+                table[first << 6 | second] = _dead_ring(first, second) or _dead_ring(second, first)
+    return bytes(table)
+
+
+_DEAD = _dead_table()
+
+
+class InferiorCells:
+    _analyses = {}
+
+    @classmethod
+    def for_size(cls, size: int):
+        # Devuelve el analizador del tamaño dado, creándolo una sola vez
+        analysis = cls._analyses.get(size)
+        if analysis is None:
+            analysis = cls._analyses[size] = cls(size)
+        return analysis
+
+    def __init__(self, size: int):
+        # Precalcula el anillo de cada casilla: vecinas reales y posiciones fuera del tablero
+        self.size = size
+        self.neighbors = neighbor_table(size)
+        rings = []
+        edges = []
+        for r in range(size):
+            for c in range(size):
+                ring = []
+                edge = [0, 0, 0]
+                for bit, (dr, dc) in enumerate(_RING):
+                    nr, nc = r + dr, c + dc
+                    row_out = not 0 <= nr < size
+                    col_out = not 0 <= nc < size
+                    if not row_out and not col_out:
+                        ring.append((bit, nr * size + nc))
+                    elif row_out != col_out:
+                        # El borde cuenta como pieza de su dueño; en las esquinas
+                        # agudas la posición toca dos bordes y no cuenta para nadie
+                        owner = 2 if row_out else 1
+                        edge[owner] |= 1 << bit
+                rings.append(tuple(ring))
+                edges.append((edge[1], edge[2]))
+        self.rings = tuple(rings)
+        self.edges = tuple(edges)
+
+    def is_dead(self, cells, idx, extra=-1, extra_player=0):
+        # Comprueba si una casilla vacía está muerta, opcionalmente con una pieza hipotética
+        first, second = self.edges[idx]
+        for bit, nb in self.rings[idx]:
+            value = extra_player if nb == extra else cells[nb]
+            if value == 1:
+                first |= 1 << bit
+            elif value == 2:
+                second |= 1 << bit
+        return _DEAD[first << 6 | second]
+
+    def captured_partner(self, cells, idx, player_id):
+        # Vecina vacía con la que la casilla forma una pareja capturada por el jugador:
+        # ocupar cualquiera de las dos con su color deja muerta a la otra
+        for _, nb in self.rings[idx]:
+            if (not cells[nb] and self.is_dead(cells, nb, idx, player_id)
+                    and self.is_dead(cells, idx, nb, player_id)):
+                return nb
+        return None
+
+    def is_inferior(self, cells, idx):
+        # Comprueba si la casilla vacía está muerta o capturada por alguno de los dos
+        return (self.is_dead(cells, idx)
+                or self.captured_partner(cells, idx, 1) is not None
+                or self.captured_partner(cells, idx, 2) is not None)
+
+    def killers(self, cells, idx, player_id):
+        # Vecinas vacías donde una pieza del rival deja muerta a la casilla: para el
+        # jugador, la casilla es vulnerable y cualquiera de ellas la domina
+        opponent = 3 - player_id
+        return [nb for _, nb in self.rings[idx]
+                if not cells[nb] and self.is_dead(cells, idx, nb, opponent)]
+
+    def prune(self, board, moves, player_id, inferior=None, killers=None):
+        # Quita de los índices dados las casillas muertas, capturadas y dominadas para el
+        # jugador que mueve; si no quedara ninguna, devuelve las originales. Los
+        # diccionarios inferior y killers, si se dan, guardan por casilla lo ya calculado
+        cells = board._cells
+        remaining = []
+        for idx in moves:
+            verdict = None if inferior is None else inferior.get(idx)
+            if verdict is None:
+                verdict = self.is_inferior(cells, idx)
+                if inferior is not None:
+                    inferior[idx] = verdict
+            if not verdict:
+                remaining.append(idx)
+        # Una jugada vulnerable se quita si alguna de sus dominadoras sigue en la lista
+        kept = set(remaining)
+        for idx in remaining:
+            dominators = None if killers is None else killers.get(idx)
+            if dominators is None:
+                dominators = self.killers(cells, idx, player_id)
+                if killers is not None:
+                    killers[idx] = dominators
+            if any(killer in kept for killer in dominators):
+                kept.discard(idx)
+        result = [idx for idx in remaining if idx in kept]
+        return result if result else list(moves)
+
+    def fill_in(self, board):
+        # Rellena hasta el punto fijo las casillas capturadas con el color de quien las
+        # captura y las muertas con el color que las rodea; devuelve las jugadas hechas
+        placed = []
+        size = board.size
+        changed = True
+        while changed:
+            changed = False
+            cells = board._cells
+            for idx in sorted(board._empty):
+                if cells[idx]:
+                    continue
+                owner = 0
+                for player_id in (1, 2):
+                    partner = self.captured_partner(cells, idx, player_id)
+                    if partner is not None:
+                        owner = player_id
+                        board.place_piece(*divmod(partner, size), player_id)
+                        placed.append((partner, player_id))
+                        break
+                if not owner and self.is_dead(cells, idx):
+                    owner = self._majority(cells, idx)
+                if owner:
+                    board.place_piece(*divmod(idx, size), owner)
+                    placed.append((idx, owner))
+                    cells = board._cells
+                    changed = True
+        return placed
+
+    def _majority(self, cells, idx):
+        # Color con más vecinas (bordes incluidos) alrededor de una casilla
+        first, second = self.edges[idx]
+        count = [0, bin(first).count("1"), bin(second).count("1")]
+        for _, nb in self.rings[idx]:
+            count[cells[nb]] += 1
+        return 1 if count[1] >= count[2] else 2
+
+    def fill_is_safe(self, board):
+        # El relleno no debe decidir la partida: entonces la búsqueda no distingue jugadas
+        return not board.check_connection(1) and not board.check_connection(2)
@@ -0,0 +1,244 @@
+import math
+import time
+import random
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from geometry import neighbor_table
+from player import Player, HexBoard, TimeManager
+
+# Motores persistentes de cada proceso de búsqueda, por jugador
+_worker_players = {}
+
+
+def _mcts_worker(task):
+    # Ejecuta en un proceso una búsqueda MCTS independiente desde la raíz
+    size, cells, player_id, deadline, seed = task
+    player = _worker_players.get(player_id)
+    if player is None:
+        player = _worker_players[player_id] = MCTSPlayer(player_id, seed=seed)
+    # La semilla de cada tarea manda, aunque el motor venga de una búsqueda anterior
+    player.rng.seed(seed)
+    return player.search(size, bytearray(cells), deadline)
+
+
+def filled_winner(cells, size, neighbors):
+    # Devuelve el ganador de un tablero lleno: siempre hay exactamente uno
+    stack = [idx for idx in range(0, size * size, size) if cells[idx] == 1]
+    seen = set(stack)
+    last = size - 1
+    while stack:
+        idx = stack.pop()
+        if idx % size == last:
+            return 1
+        for nb in neighbors[idx]:
+            if cells[nb] == 1 and nb not in seen:
+                seen.add(nb)
+                stack.append(nb)
+    return 2
+
+
+class _Node:
+    # Nodo del árbol; las estadísticas de cada jugada se guardan en listas del padre
+    __slots__ = ('player', 'visits', 'moves', 'n', 'w', 'amaf_n', 'amaf_w', 'children')
+
+    def __init__(self, player):
+        # El nodo se crea sin expandir; las listas aparecen tras unas cuantas visitas
+        self.player = player
+        self.visits = 0
+        self.moves = None
+        self.n = None
+        self.w = None
+        self.amaf_n = None
+        self.amaf_w = None
+        self.children = {}
+
+    def expand(self, cells):
+        # Crea las estadísticas de todas las casillas vacías de la posición
+        self.moves = [idx for idx, value in enumerate(cells) if not value]
+        count = len(self.moves)
+        self.n = [0] * count
+        self.w = [0] * count
+        self.amaf_n = [0] * count
+        self.amaf_w = [0] * count
+
+
+class MCTSPlayer(Player):
+    def __init__(self, player_id: int, max_time: int=10, game_time: float=None,
+                 exploration: float=0.3, rave_equivalence: int=500, expand_after: int=4,
+                 workers: int=1, seed: int=None):
+        # Inicializa un jugador MCTS con UCT, RAVE/AMAF y reutilización del árbol
+        super().__init__(player_id)
+        self.opponent_id = 3 - player_id
+        self.max_time = max_time
+        self.time_manager = TimeManager(max_time, game_time)
+        self.exploration = exploration
+        self.rave_equivalence = rave_equivalence
+        self.expand_after = expand_after
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.playouts = 0
+        self._root = None
+        self._root_cells = None
+        self._pool = None
+
+    def play(self, board: HexBoard):
+        # Busca hasta agotar el tiempo de la jugada y devuelve la casilla más visitada
+        if not isinstance(board, HexBoard):
+            board = HexBoard.from_matrix(board.board)
+        size = board.size
+        cells = bytearray(board._cells)
+        empty_cells = cells.count(0)
+        if empty_cells >= size * size - 1:
+            self.time_manager.new_game()
+        self.time_manager.begin_move(empty_cells)
+        try:
+            deadline = self.time_manager.hard_deadline
+            if self.workers > 1:
+                visits = self._parallel_search(size, cells, deadline)
+            else:
+                visits = self.search(size, cells, deadline)
+        finally:
+            self.time_manager.end_move()
+
+        best = max(sorted(visits), key=lambda move: visits[move][0])
+        if self.workers <= 1:
+            self._advance(best, cells)
+        return divmod(best, size)
+
+    def search(self, size, cells, deadline):
+        # Hace iteraciones hasta la hora límite; devuelve {casilla: (visitas, victorias)}
+        root = self._root = self._reuse_tree(cells)
+        if root.moves is None:
+            root.expand(cells)
+        neighbors = neighbor_table(size)
+        self.playouts = 0
+        # Al menos una iteración, para tener siempre una jugada que devolver
+        while True:
+            self._iterate(root, cells, size, neighbors)
+            self.playouts += 1
+            if time.time() >= deadline:
+                break
+        return {move: (root.n[i], root.w[i]) for i, move in enumerate(root.moves)}
+
+    def _reuse_tree(self, cells):
+        # Baja por el árbol anterior con las jugadas hechas desde entonces, si encajan
+        root = self._root
+        previous = self._root_cells
+        self._root = None
+        self._root_cells = bytearray(cells)
+        if root is None or previous is None or len(previous) != len(cells):
+            return _Node(self.player_id)
+        new_moves = [idx for idx, (old, new) in enumerate(zip(previous, cells)) if old != new]
+        if any(previous[idx] for idx in new_moves) or len(new_moves) > 1:
+            return _Node(self.player_id)
+        node = root
+        for idx in new_moves:
+            if cells[idx] != node.player:
+                return _Node(self.player_id)
+            node = node.children.get(idx)
+            if node is None:
+                return _Node(self.player_id)
+        if node.player != self.player_id:
+            return _Node(self.player_id)
+        return node
+
+    def _advance(self, move, cells):
+        # Conserva el subárbol de la jugada elegida para la próxima llamada
+        self._root = self._root.children.get(move) if self._root is not None else None
+        self._root_cells = bytearray(cells)
+        self._root_cells[move] = self.player_id
+
+    def _select(self, node):
+        # Elige la jugada con mayor valor UCT mezclado con AMAF según las visitas
+        log_visits = math.log(node.visits + 1)
+        k = self.rave_equivalence
+        c = self.exploration
+        best_value = -1.0
+        best_index = 0
+        n, w, amaf_n, amaf_w = node.n, node.w, node.amaf_n, node.amaf_w
+        for i in range(len(node.moves)):
+            visits = n[i]
+            amaf = amaf_w[i] / amaf_n[i] if amaf_n[i] else 0.5
+            if visits == 0:
+                # Las jugadas sin visitar se prueban primero, ordenadas por AMAF
+                value = 10.0 + amaf
+            else:
+                beta = math.sqrt(k / (3 * visits + k))
+                value = ((1 - beta) * w[i] / visits + beta * amaf
+                         + c * math.sqrt(log_visits / visits))
+            if value > best_value:
+                best_value = value
+                best_index = i
+        return best_index
+
+    def _iterate(self, root, root_cells, size, neighbors):
+        # Selección, expansión, simulación aleatoria y retropropagación con AMAF
+        cells = bytearray(root_cells)
+        node = root
+        path = []
+        while node.moves:
+            i = self._select(node)
+            move = node.moves[i]
+            cells[move] = node.player
+            path.append((node, i))
+            child = node.children.get(move)
+            if child is None:
+                child = node.children[move] = _Node(3 - node.player)
+            node = child
+            if node.moves is None:
+                if node.visits + 1 >= self.expand_after and 0 in cells:
+                    node.expand(cells)
+                break
+
+        # Simulación: se rellenan las vacías alternando colores; un tablero lleno tiene un ganador
+        empties = [idx for idx, value in enumerate(cells) if not value]
+        self.rng.shuffle(empties)
+        mover = node.player
+        other = 3 - mover
+        for k, idx in enumerate(empties):
+            cells[idx] = mover if k % 2 == 0 else other
+        winner = filled_winner(cells, size, neighbors)
+
+        node.visits += 1
+        for parent, i in path:
+            won = 1 if winner == parent.player else 0
+            parent.visits += 1
+            parent.n[i] += 1
+            parent.w[i] += won
+            # AMAF: toda jugada del mismo jugador hecha después de este nodo cuenta como suya
+            player = parent.player
+            amaf_n = parent.amaf_n
+            amaf_w = parent.amaf_w
+            for j, move in enumerate(parent.moves):
+                if cells[move] == player:
+                    amaf_n[j] += 1
+                    amaf_w[j] += won
+        if not path:
+            root.visits += 1
+
+    def _parallel_search(self, size, cells, deadline):
+        # Paraleliza en la raíz: cada proceso busca por su cuenta y se suman las visitas
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        seed = self.seed if self.seed is not None else self.rng.getrandbits(32)
+        futures = [
+            self._pool.submit(_mcts_worker, (size, bytes(cells), self.player_id, deadline, seed + worker))
+            for worker in range(self.workers)
+        ]
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.time()) + 0.5)
+        visits = {}
+        for future in futures:
+            if future in done:
+                for move, (n, w) in future.result().items():
+                    old_n, old_w = visits.get(move, (0, 0))
+                    visits[move] = (old_n + n, old_w + w)
+        if not visits:
+            visits = {idx: (0, 0) for idx, value in enumerate(cells) if not value}
+        return visits
+
+    def close(self):
+        # Libera los procesos de búsqueda paralela
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,187 @@
+from geometry import TOP, BOTTOM, LEFT, RIGHT, GOAL_EDGES, Geometry
+
+# Plantillas de borde para el borde superior, como desplazamientos (fila, columna)
+# respecto a la piedra; el resto de bordes se obtienen por simetría del tablero
+EDGE_TEMPLATES = {
+    # Plantilla II: piedra en la segunda fila y las dos casillas del borde
+    "II": ((-1, 0), (-1, 1)),
+    # Plantilla IIIa (zigurat) y su reflejo: piedra en la tercera fila
+    "IIIa": ((-2, -1), (-2, 0), (-2, 1), (-2, 2), (-1, -1), (-1, 0), (-1, 1), (0, -1)),
+    "IIIa'": ((-2, 0), (-2, 1), (-2, 2), (-2, 3), (-1, 0), (-1, 1), (-1, 2), (0, 1)),
+}
+
+# Transformaciones que llevan el borde superior a cada borde del tablero
+_EDGE_TRANSFORMS = {
+    TOP: lambda dr, dc: (dr, dc),
+    BOTTOM: lambda dr, dc: (-dr, -dc),
+    LEFT: lambda dr, dc: (dc, dr),
+    RIGHT: lambda dr, dc: (-dc, -dr),
+}
+
+
+def _iter_bits(mask):
+    # Recorre los índices de los bits activos de una máscara
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PatternEngine:
+    _engines = {}
+
+    @classmethod
+    def for_size(cls, size: int):
+        # Devuelve el motor de patrones del tamaño dado, creándolo una sola vez
+        engine = cls._engines.get(size)
+        if engine is None:
+            engine = cls._engines[size] = cls(size)
+        return engine
+
+    def __init__(self, size: int):
+        # Precalcula las plantillas de borde de todas las casillas; vecinas y puentes
+        # (pareja, máscara del portador, portador 1, portador 2) vienen de la geometría
+        self.size = size
+        self.geometry = Geometry.for_size(size)
+        self.neighbors = self.geometry.neighbors
+        self.neighbor_masks = self.geometry.masks
+        self.bridges = self.geometry.bridges
+
+        # Plantillas de borde por jugador: (borde, máscara del portador, nombre)
+        self.edge_templates = ((), self._build_edge_templates(1), self._build_edge_templates(2))
+        # Máscara de las casillas que tienen alguna plantilla de borde para cada jugador
+        self.template_cells = tuple(
+            sum(1 << idx for idx, found in enumerate(table) if found)
+            for table in self.edge_templates
+        )
+
+    def _build_edge_templates(self, player_id):
+        # Coloca cada plantilla en las casillas donde cabe entera dentro del tablero
+        size = self.size
+        table = []
+        for r in range(size):
+            for c in range(size):
+                found = []
+                for edge in (TOP, BOTTOM, LEFT, RIGHT):
+                    if not edge & GOAL_EDGES[player_id]:
+                        continue
+                    transform = _EDGE_TRANSFORMS[edge]
+                    for name, shape in EDGE_TEMPLATES.items():
+                        cells = [transform(dr, dc) for dr, dc in shape]
+                        cells = [(r + dr, c + dc) for dr, dc in cells]
+                        if not all(0 <= cr < size and 0 <= cc < size for cr, cc in cells):
+                            continue
+                        # La plantilla solo vale si el portador llega a la línea del borde
+                        if not self._touches_edge(cells, edge):
+                            continue
+                        mask = 0
+                        for cr, cc in cells:
+                            mask |= 1 << (cr * size + cc)
+                        found.append((edge, mask, name))
+                table.append(tuple(found))
+        return tuple(table)
+
+    def _touches_edge(self, cells, edge):
+        # Comprueba que el portador llega a la línea del borde indicado
+        distance = self.geometry.edge_distance[edge]
+        size = self.size
+        return any(distance[r * size + c] == 0 for r, c in cells)
+
+    def bridge_links(self, board, player_id):
+        # Puentes intactos entre piedras propias de grupos distintos: (a, b, portador)
+        stones = board.stones[player_id]
+        opponent = board.stones[3 - player_id]
+        links = []
+        for idx in _iter_bits(stones):
+            for partner, carrier, _, _ in self.bridges[idx]:
+                if partner > idx and stones >> partner & 1 and not carrier & opponent:
+                    if board.root(idx) != board.root(partner):
+                        links.append((idx, partner, carrier))
+        return links
+
+    def threatened_bridges(self, board, player_id):
+        # Puentes propios con un portador invadido: (a, b, casilla de respuesta)
+        stones = board.stones[player_id]
+        opponent = board.stones[3 - player_id]
+        threats = []
+        for idx in _iter_bits(stones):
+            for partner, _, c1, c2 in self.bridges[idx]:
+                if partner < idx or not stones >> partner & 1:
+                    continue
+                hit1 = opponent >> c1 & 1
+                hit2 = opponent >> c2 & 1
+                if hit1 != hit2 and board.root(idx) != board.root(partner):
+                    reply = c2 if hit1 else c1
+                    if not stones >> reply & 1:
+                        threats.append((idx, partner, reply))
+        return threats
+
+    def edge_links(self, board, player_id):
+        # Plantillas de borde intactas de grupos que aún no tocan ese borde
+        opponent = board.stones[3 - player_id]
+        table = self.edge_templates[player_id]
+        links = []
+        for idx in _iter_bits(board.stones[player_id] & self.template_cells[player_id]):
+            touched = board.edges_of(idx)
+            for edge, carrier, _ in table[idx]:
+                if not touched & edge and not carrier & opponent:
+                    links.append((idx, edge, carrier))
+        return links
+
+    def threatened_edge_links(self, board, player_id):
+        # Casillas que restauran una plantilla II invadida: la otra casilla del borde
+        stones = board.stones[player_id]
+        opponent = board.stones[3 - player_id]
+        replies = []
+        for idx in _iter_bits(stones & self.template_cells[player_id]):
+            touched = board.edges_of(idx)
+            for edge, carrier, name in self.edge_templates[player_id][idx]:
+                if name != "II" or touched & edge:
+                    continue
+                hit = carrier & opponent
+                free = carrier & ~opponent & ~stones
+                if hit and free:
+                    replies.append(free.bit_length() - 1)
+        return replies
+
+    def virtual_edges(self, board, player_id):
+        # Bordes que cada grupo alcanza virtualmente mediante plantillas: {raíz: banderas}
+        result = {}
+        for idx, edge, _ in self.edge_links(board, player_id):
+            root = board.root(idx)
+            result[root] = result.get(root, 0) | edge
+        return result
+
+    def connection_cells(self, board, player_id, groups=None):
+        # Casillas vacías que unen grupos del jugador, como conjunto de (fila, columna)
+        if groups is None:
+            groups = board.groups(player_id)
+        mask = self.connection_mask(board, player_id, [group.liberties for group in groups])
+        size = self.size
+        return {divmod(idx, size) for idx in _iter_bits(mask)}
+
+    def connection_mask(self, board, player_id, liberties):
+        # Máscara de casillas vacías que unen grupos dadas sus libertades: portadores de
+        # puentes entre grupos, casillas adyacentes a dos grupos y parejas vecinas que los enlazan
+        empty = ~(board.stones[1] | board.stones[2])
+        cells = 0
+
+        owner = {}
+        for bit, group_liberties in enumerate(liberties):
+            for idx in _iter_bits(group_liberties):
+                owner[idx] = owner.get(idx, 0) | (1 << bit)
+
+        neighbor_masks = self.neighbor_masks
+        for idx, owners in owner.items():
+            if owners & (owners - 1):
+                cells |= 1 << idx
+            for nb in _iter_bits(neighbor_masks[idx] & empty):
+                other = owner.get(nb)
+                if other is not None:
+                    joined = owners | other
+                    if joined & (joined - 1):
+                        cells |= (1 << idx) | (1 << nb)
+
+        for _, _, carrier in self.bridge_links(board, player_id):
+            cells |= carrier & empty
+        return cells
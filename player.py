@@ -1,6 +1,14 @@
+import json
 import time
 import copy
 import random
+import threading
+import multiprocessing
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from geometry import (TOP, BOTTOM, LEFT, RIGHT, GOAL_EDGES, DIRECTIONS, Geometry, adjacent,
+                      bits_to_cells, edge_cells, edge_flags, neighbor_masks, neighbor_table)
 
 class Player:
     def __init__(self, player_id: int):
@@ -12,39 +20,1223 @@ class Player:
         raise NotImplementedError("¡Implementa este método!")
 
 
+# Distancia que marca una casilla inalcanzable en los mapas de distancias
+_INF = 1 << 30
+
+_ZOBRIST_TABLES = {}
+
+# Clave que se combina con el hash cuando mueve el jugador que busca
+SIDE_KEY = 0x9E3779B97F4A7C15
+
+
+def zobrist_table(size: int):
+    # Devuelve las claves Zobrist de 64 bits de cada casilla para cada jugador
+    table = _ZOBRIST_TABLES.get(size)
+    if table is None:
+        rng = random.Random(0x4E58 + size)
+        n = size * size
+        table = (
+            (),
+            tuple(rng.getrandbits(64) for _ in range(n)),
+            tuple(rng.getrandbits(64) for _ in range(n)),
+        )
+        _ZOBRIST_TABLES[size] = table
+    return table
+
+
+class Group(list):
+    # Lista de casillas de un grupo junto con los bordes que toca y sus libertades
+    __slots__ = ('root', 'edges', 'liberties')
+
+    def __init__(self, cells, root, edges, liberties):
+        super().__init__(cells)
+        self.root = root
+        self.edges = edges
+        self.liberties = liberties
+
+
+class _BoardView:
+    # Vista de solo lectura con la forma board[r][c] sobre el tablero de bits
+    __slots__ = ('_hex',)
+
+    def __init__(self, hex_board):
+        self._hex = hex_board
+
+    def __len__(self):
+        return self._hex.size
+
+    def __getitem__(self, r):
+        size = self._hex.size
+        if r < 0:
+            r += size
+        if not 0 <= r < size:
+            raise IndexError("fila fuera del tablero")
+        start = r * size
+        # Una tupla: board[r][c] = v falla en lugar de escribir en una copia que se pierde
+        return tuple(self._hex._cells[start:start + size])
+
+    def __iter__(self):
+        for r in range(self._hex.size):
+            yield self[r]
+
+
 class HexBoard:
     def __init__(self, size: int):
         # Inicializa un tablero de Hex con el tamaño especificado
+        n = size * size
         self.size = size
-        self.board = [[0 for _ in range(size)] for _ in range(size)]
+        # Máscara de bits de las piezas de cada jugador (el índice 0 no se usa)
+        self.stones = [0, 0, 0]
+        # Hash Zobrist de la posición, actualizado al colocar y deshacer piezas
+        self.hash = 0
+        self._cells = bytearray(n)
+        self._empty = set(range(n))
+        # Unión-búsqueda de grupos; la raíz guarda tamaño, bordes, libertades y piezas
+        self._parent = list(range(n))
+        self._group_size = [1] * n
+        self._edges = [0] * n
+        self._libs = [0] * n
+        self._members = [0] * n
+        self._connected = [False, False, False]
+        self._shared = False
+        # Pila de jugadas (casilla, jugador, marca del rastro, conexión previa) y
+        # rastro con el estado anterior de cada nodo de grupo modificado
+        self._moves = []
+        self._trail = []
+        self.board = _BoardView(self)
+
+    @classmethod
+    def from_stones(cls, size, stones):
+        # Construye un tablero a partir de las máscaras de bits de ambos jugadores
+        board = cls(size)
+        for player_id in (1, 2):
+            mask = stones[player_id]
+            while mask:
+                low = mask & -mask
+                board.place_piece(*divmod(low.bit_length() - 1, size), player_id)
+                mask ^= low
+        board._moves = []
+        board._trail = []
+        return board
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        # Construye un tablero a partir de una matriz de 0, 1 y 2
+        board = cls(len(matrix))
+        for r, row in enumerate(matrix):
+            for c, value in enumerate(row):
+                if value:
+                    board.place_piece(r, c, value)
+        board._moves = []
+        board._trail = []
+        return board
 
     def clone(self):
-        # Crea una copia del tablero actual
-        pass
+        # Crea una copia del tablero actual en tiempo constante (copia al escribir)
+        other = HexBoard.__new__(HexBoard)
+        other.size = self.size
+        other.stones = self.stones[:]
+        other.hash = self.hash
+        other._cells = self._cells
+        other._empty = self._empty
+        other._parent = self._parent
+        other._group_size = self._group_size
+        other._edges = self._edges
+        other._libs = self._libs
+        other._members = self._members
+        other._connected = self._connected[:]
+        other._shared = self._shared = True
+        # El clon no hereda la pila de deshacer del original
+        other._moves = []
+        other._trail = []
+        other.board = _BoardView(other)
+        return other
+
+    def _own(self):
+        # Duplica las estructuras compartidas con un clon antes de modificarlas
+        self._cells = bytearray(self._cells)
+        self._empty = set(self._empty)
+        self._parent = self._parent[:]
+        self._group_size = self._group_size[:]
+        self._edges = self._edges[:]
+        self._libs = self._libs[:]
+        self._members = self._members[:]
+        self._shared = False
+
+    def _find(self, x):
+        # Busca la raíz del grupo de un nodo (sin compresión para poder deshacer)
+        parent = self._parent
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    def _save(self, x):
+        # Anota en el rastro el estado de un nodo antes de modificarlo
+        self._trail.append((x, self._parent[x], self._group_size[x], self._edges[x],
+                            self._libs[x], self._members[x]))
+
+    def _union(self, a, b):
+        # Une los grupos de dos casillas por tamaño y combina bordes, libertades y piezas
+        ra = self._find(a)
+        rb = self._find(b)
+        if ra == rb:
+            return rb
+        group_size = self._group_size
+        if group_size[ra] > group_size[rb]:
+            ra, rb = rb, ra
+        self._save(ra)
+        self._save(rb)
+        self._parent[ra] = rb
+        group_size[rb] += group_size[ra]
+        self._edges[rb] |= self._edges[ra]
+        self._libs[rb] |= self._libs[ra]
+        self._members[rb] |= self._members[ra]
+        return rb
 
     def place_piece(self, row: int, col: int, player_id: int) -> bool:
         # Coloca una pieza del jugador en la posición especificada
-        pass
+        size = self.size
+        if not (0 <= row < size and 0 <= col < size) or player_id not in (1, 2):
+            return False
+        idx = row * size + col
+        if self._cells[idx]:
+            return False
+        if self._shared:
+            self._own()
+
+        self._moves.append((idx, player_id, len(self._trail), self._connected[player_id]))
+        cells = self._cells
+        cells[idx] = player_id
+        self._empty.discard(idx)
+        self.stones[player_id] |= 1 << idx
+        self.hash ^= zobrist_table(size)[player_id][idx]
+
+        bit = 1 << idx
+        empty_mask = ~(self.stones[1] | self.stones[2])
+        self._save(idx)
+        self._parent[idx] = idx
+        self._group_size[idx] = 1
+        self._edges[idx] = edge_flags(size)[idx]
+        self._libs[idx] = neighbor_masks(size)[idx] & empty_mask
+        self._members[idx] = bit
+
+        # La casilla deja de ser libertad de todos los grupos vecinos, de ambos colores
+        neighbors = neighbor_table(size)[idx]
+        touched = set()
+        for nb in neighbors:
+            if cells[nb]:
+                root = self._find(nb)
+                if root not in touched:
+                    touched.add(root)
+                    self._save(root)
+                    self._libs[root] &= ~bit
+
+        root = idx
+        for nb in neighbors:
+            if cells[nb] == player_id:
+                root = self._union(root, nb)
+
+        goal = GOAL_EDGES[player_id]
+        if self._edges[root] & goal == goal:
+            self._connected[player_id] = True
+        return True
+
+    def undo(self):
+        # Deshace la última pieza colocada restaurando grupos y conexiones a borde
+        idx, player_id, mark, connected = self._moves.pop()
+        if self._shared:
+            self._own()
+        trail = self._trail
+        parent = self._parent
+        group_size = self._group_size
+        edges = self._edges
+        libs = self._libs
+        members = self._members
+        while len(trail) > mark:
+            x, parent[x], group_size[x], edges[x], libs[x], members[x] = trail.pop()
+        self._connected[player_id] = connected
+        self._cells[idx] = 0
+        self._empty.add(idx)
+        self.stones[player_id] &= ~(1 << idx)
+        self.hash ^= zobrist_table(self.size)[player_id][idx]
+        return divmod(idx, self.size)
+
+    def root(self, idx: int) -> int:
+        # Devuelve la raíz del grupo de una casilla ocupada, en índice plano
+        return self._find(idx)
+
+    def edges_of(self, idx: int) -> int:
+        # Devuelve las banderas de borde del grupo de una casilla ocupada, en índice plano
+        return self._edges[self._find(idx)]
+
+    def changed_stones(self) -> int:
+        # Máscara de las piezas cuyo grupo cambió de raíz o de bordes con la última jugada,
+        # leída del rastro: solo la casilla jugada si quedó aislada o se sumó a un único
+        # grupo sin cambiarle los bordes, y el grupo entero si unió grupos o ganó un borde
+        idx, _, mark, _ = self._moves[-1]
+        parent = self._parent
+        edges = self._edges
+        for x, _, _, old_edges, _, _ in self._trail[mark + 1:]:
+            if x != idx and (parent[x] != x or edges[x] != old_edges):
+                return self._members[self._find(idx)]
+        return 1 << idx
+
+    def group_edges(self, row: int, col: int) -> int:
+        # Devuelve las banderas de borde del grupo que ocupa la casilla (0 si está vacía)
+        idx = row * self.size + col
+        if not self._cells[idx]:
+            return 0
+        return self._edges[self._find(idx)]
+
+    def groups(self, player_id: int) -> list:
+        # Devuelve los grupos del jugador sin recorrer el tablero
+        size = self.size
+        parent = self._parent
+        result = []
+        mask = self.stones[player_id]
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            mask ^= low
+            if parent[idx] == idx:
+                result.append(Group(bits_to_cells(self._members[idx], size), idx,
+                                    self._edges[idx], self._libs[idx]))
+        return result
 
     def get_possible_moves(self) -> list:
         # Obtiene una lista de todos los movimientos posibles
-        pass
-    
+        size = self.size
+        return [divmod(idx, size) for idx in self._empty]
+
+    def empty_count(self) -> int:
+        # Número de casillas vacías, sin recorrer el tablero
+        return len(self._empty)
+
     def check_connection(self, player_id: int) -> bool:
         # Verifica si el jugador ha creado una conexión ganadora
-        pass
+        if player_id not in (1, 2):
+            return False
+        return self._connected[player_id]
+
+
+# Tipos de cota de una entrada de la tabla de transposición
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    # Memoria aproximada que ocupa cada entrada (clave, tupla y enteros)
+    ENTRY_BYTES = 160
+
+    def __init__(self, megabytes: int = 32):
+        # Reserva un número de entradas potencia de dos que cabe en el presupuesto
+        slots = 1
+        while slots * 2 * self.ENTRY_BYTES <= megabytes * 1024 * 1024:
+            slots *= 2
+        self.mask = slots - 1
+        self.keys = [0] * slots
+        self.entries = [None] * slots
+        self.generation = 0
+
+    def new_search(self):
+        # Envejece las entradas de búsquedas anteriores para que puedan reemplazarse
+        self.generation += 1
+
+    def clear(self):
+        # Vacía la tabla
+        slots = self.mask + 1
+        self.keys = [0] * slots
+        self.entries = [None] * slots
+
+    def probe(self, key):
+        # Devuelve (profundidad, valor, cota, mejor jugada, generación) o None
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            return self.entries[slot]
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        # Guarda una entrada prefiriendo las más profundas y las de la búsqueda actual
+        slot = key & self.mask
+        old = self.entries[slot]
+        if (old is not None and self.keys[slot] != key
+                and old[4] == self.generation and old[0] > depth):
+            return
+        self.keys[slot] = key
+        self.entries[slot] = (depth, value, flag, move, self.generation)
+
+
+class EvalCache:
+    # Memoria aproximada que ocupa cada entrada (nodo del diccionario ordenado, clave y valor)
+    ENTRY_BYTES = 200
+
+    def __init__(self, megabytes: int = 16):
+        # Evaluaciones por hash de la posición con expulsión de la menos usada; el cerrojo
+        # permite compartirla entre hilos (la reflexión busca mientras el rival piensa)
+        self.max_entries = max(1, megabytes * 1024 * 1024 // self.ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        # Consulta sin contar acierto ni fallo ni cambiar el orden de uso
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        # Devuelve la evaluación guardada o None, y la marca como la más reciente
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        # Guarda una evaluación; al superar el tope expulsa la menos usada
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        # Vacía la caché sin tocar las estadísticas
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        # Aciertos, fallos y ocupación de la caché
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class MoveOrderer:
+    # Bonificaciones que fijan la prioridad: jugada de la tabla, asesinas, historial
+    TT_BONUS = 1 << 40
+    KILLER_BONUS = (1 << 38, 1 << 37)
+
+    def __init__(self):
+        # Jugadas asesinas por ply, tabla de historial por casilla y estadísticas de cortes
+        self.killers = []
+        self.history = None
+        self.size = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        # Reinicia los contadores de nodos internos y cortes beta
+        self.nodes = 0
+        self.moves_searched = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.cutoffs_by_ply = []
+        self.iteration_nodes = []
+
+    def new_search(self, size):
+        # Prepara una búsqueda: olvida las asesinas y envejece el historial
+        if self.size != size:
+            self.size = size
+            self.history = [None, [0] * (size * size), [0] * (size * size)]
+        else:
+            for table in self.history[1:]:
+                for idx, value in enumerate(table):
+                    table[idx] = value >> 1
+        self.killers = []
+        self.reset_stats()
+
+    def order(self, moves, ply, player_id, tt_move=None, static_scores=None):
+        # Ordena las jugadas: tabla de transposición, asesinas, historial y puntuación estática
+        size = self.size
+        history = self.history[player_id]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def priority(move):
+            if move == tt_move:
+                return self.TT_BONUS
+            idx = move[0] * size + move[1]
+            score = history[idx]
+            if static_scores is not None:
+                score += static_scores[idx]
+            for slot, killer in enumerate(killers):
+                if move == killer:
+                    score += self.KILLER_BONUS[slot]
+            return score
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_node(self, searched):
+        # Anota un nodo interior y cuántas jugadas llegó a examinar
+        self.nodes += 1
+        self.moves_searched += searched
+
+    def record_cutoff(self, move, ply, depth, player_id, index):
+        # Premia la jugada que produjo un corte beta en este ply
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[player_id][move[0] * self.size + move[1]] += depth * depth
+
+        while len(self.cutoffs_by_ply) <= ply:
+            self.cutoffs_by_ply.append(0)
+        self.cutoffs_by_ply[ply] += 1
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    def record_iteration(self, nodes):
+        # Anota los nodos de una iteración completa de la profundización iterativa
+        self.iteration_nodes.append(nodes)
+
+    def summary(self) -> dict:
+        # Resume los cortes y el factor de ramificación efectivo observado
+        ebf = None
+        totals = self.iteration_nodes
+        if len(totals) >= 2 and totals[-2]:
+            ebf = totals[-1] / totals[-2]
+        return {
+            "interior_nodes": self.nodes,
+            "cutoffs": self.cutoffs,
+            "cutoff_rate": self.cutoffs / self.nodes if self.nodes else 0.0,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "moves_per_node": self.moves_searched / self.nodes if self.nodes else 0.0,
+            "cutoffs_by_ply": list(self.cutoffs_by_ply),
+            "effective_branching_factor": ebf,
+        }
+
+
+class _CandidateState:
+    # Pesos por casilla de una posición y veredictos de casillas inferiores ya calculados
+    __slots__ = ('key', 'weights', 'inferior', 'killers')
+
+    def __init__(self, key, weights, inferior, killers):
+        self.key = key
+        self.weights = weights
+        self.inferior = inferior
+        self.killers = killers
+
+
+class CandidateGenerator:
+    # Peso de cada motivo por el que una casilla es candidata; la suma decide el orden
+    CONNECT_WEIGHT = 8
+    DEFEND_WEIGHT = 4
+    LINK_WEIGHT = 2
+    CARRIER_WEIGHT = 1
+
+    def __init__(self, max_candidates: int = 40, cache_entries: int = 1 << 15):
+        # Guarda las listas ya calculadas por posición, las vecindades por máscara y el
+        # estado de cada posición del camino actual, indexado por número de jugadas
+        self.max_candidates = max_candidates
+        # Tope por tamaño de tablero que fija el jugador (modo de tableros grandes)
+        self.size_cap = None
+        # Quita las casillas muertas, capturadas y dominadas para el jugador que mueve
+        self.prune_inferior = True
+        self.cache_entries = cache_entries
+        self.size = None
+        self._positions = OrderedDict()
+        self._dilations = OrderedDict()
+        self._path = []
+        self.hits = 0
+        self.misses = 0
+        self.derived = 0
+
+    def new_search(self, size):
+        # Conserva las memorias entre búsquedas salvo que cambie el tamaño del tablero
+        if self.size != size:
+            self.size = size
+            self._positions = OrderedDict()
+            self._dilations = OrderedDict()
+            self._path = []
+        self.hits = 0
+        self.misses = 0
+        self.derived = 0
+
+    def set_size_cap(self, cap):
+        # Cambia el tope por tamaño; las listas memorizadas con otro tope se descartan
+        if cap != self.size_cap:
+            self.size_cap = cap
+            self._positions = OrderedDict()
+
+    def generate(self, board, player_id, static_scores=None, mover=None):
+        # Devuelve las candidatas ordenadas por peso y acotadas a max_candidates; si se
+        # indica quién mueve, sin las casillas inferiores para él. Los pesos de una
+        # posición nueva salen de los de la anterior del camino, recalculando solo la zona
+        # que tocó la última jugada (_state)
+        key = board.hash if mover is None else (board.hash, mover)
+        moves = self._positions.get(key)
+        if moves is not None:
+            self.hits += 1
+            return list(moves)
+        self.misses += 1
+        if self.size != board.size:
+            self.new_search(board.size)
+
+        state = self._state(board, player_id)
+        weights = state.weights
+        if not weights:
+            # Sin motivos tácticos: casillas junto a las piezas propias, o todas las vacías
+            empty = ~(board.stones[1] | board.stones[2])
+            mask = self._dilate(board.stones[player_id]) & empty
+            cells = [idx for idx in range(board.size * board.size) if mask >> idx & 1]
+            if not cells:
+                cells = list(board._empty)
+            weights = dict.fromkeys(cells, 0)
+
+        if mover is not None and self.prune_inferior and len(weights) > 1:
+            from inferior import InferiorCells
+            # En orden de casilla: la dominación mutua se resuelve según el orden de la lista
+            kept = InferiorCells.for_size(board.size).prune(
+                board, sorted(weights), mover, state.inferior, state.killers[mover])
+            weights = {idx: weights[idx] for idx in kept}
+
+        if static_scores is None:
+            ranked = sorted(weights, key=lambda idx: (-weights[idx], idx))
+        else:
+            ranked = sorted(weights, key=lambda idx: (-weights[idx], -static_scores[idx], idx))
+        limit = self.max_candidates
+        if self.size_cap is not None:
+            limit = self.size_cap if limit is None else min(limit, self.size_cap)
+        if limit is not None:
+            del ranked[limit:]
+        size = board.size
+        moves = [divmod(idx, size) for idx in ranked]
+
+        if len(self._positions) >= self.cache_entries:
+            self._positions.popitem(last=False)
+        self._positions[key] = moves
+        return list(moves)
+
+    def set_root(self, board, player_id):
+        # Calcula el estado de la raíz de una búsqueda para que lo deriven sus hijas
+        if self.size != board.size:
+            self.new_search(board.size)
+        self._state(board, player_id)
+
+    def _state(self, board, player_id):
+        # Estado de la posición del tablero. Si la posición anterior del camino tiene el
+        # suyo, se copia y solo se recalculan las casillas a distancia dos o menos de la
+        # jugada o de las piezas cuyo grupo cambió (los motivos y los veredictos de una
+        # casilla solo miran esa vecindad y los bordes e identidad de sus grupos). Si la
+        # anterior se sirvió de memoria sin estado, se reconstruye deshaciendo la jugada
+        path = self._path
+        depth = len(board._moves)
+        key = (board.hash, player_id)
+        if depth < len(path) and path[depth] is not None and path[depth].key == key:
+            return path[depth]
+        state = None
+        if depth and depth <= len(path):
+            idx, owner = board._moves[-1][:2]
+            parent_hash = board.hash ^ zobrist_table(board.size)[owner][idx]
+            parent = path[depth - 1]
+            if parent is not None and parent.key == (parent_hash, player_id):
+                state = self._derive(parent, board, idx)
+            elif any(memo in self._positions for memo in (parent_hash, (parent_hash, 1), (parent_hash, 2))):
+                board.undo()
+                try:
+                    parent = self._state(board, player_id)
+                finally:
+                    board.place_piece(idx // board.size, idx % board.size, owner)
+                state = self._derive(parent, board, idx)
+        if state is None:
+            state = _CandidateState(key, self._weights(board, player_id), {}, (None, {}, {}))
+        self._judge(board, state)
+        del path[depth:]
+        path.extend([None] * (depth - len(path)))
+        path.append(state)
+        return state
+
+    def _derive(self, parent, board, idx):
+        # Estado de la posición tras la jugada idx a partir del de la anterior
+        self.derived += 1
+        player_id = parent.key[1]
+        # Los veredictos miran casillas a distancia dos (capturadas) o uno (dominadoras)
+        touching = self._dilate(1 << idx) | 1 << idx
+        near = self._dilate(touching)
+        changed = board.changed_stones()
+        dirty = near if changed == 1 << idx else self._dilate(self._dilate(changed))
+        weights = dict(parent.weights)
+        inferior = dict(parent.inferior)
+        killers = (None, dict(parent.killers[1]), dict(parent.killers[2]))
+        cells = board._cells
+        rest = near
+        while rest:
+            low = rest & -rest
+            cell = low.bit_length() - 1
+            rest ^= low
+            inferior.pop(cell, None)
+            if touching & low:
+                killers[1].pop(cell, None)
+                killers[2].pop(cell, None)
+        rest = dirty
+        while rest:
+            low = rest & -rest
+            cell = low.bit_length() - 1
+            rest ^= low
+            weights.pop(cell, None)
+            if not cells[cell]:
+                weight = self._cell_weight(board, cell, player_id)
+                if weight:
+                    weights[cell] = weight
+        return _CandidateState((board.hash, player_id), weights, inferior, killers)
+
+    def _judge(self, board, state):
+        # Completa los veredictos de las casillas con peso: si es inferior y, si no, sus
+        # dominadoras para cada jugador, así las posiciones derivadas solo calculan los suyos
+        if not self.prune_inferior:
+            return
+        from inferior import InferiorCells
+        analysis = InferiorCells.for_size(board.size)
+        cells = board._cells
+        inferior = state.inferior
+        killers = state.killers
+        for cell in state.weights:
+            verdict = inferior.get(cell)
+            if verdict is None:
+                verdict = inferior[cell] = analysis.is_inferior(cells, cell)
+            if not verdict:
+                for mover in (1, 2):
+                    if cell not in killers[mover]:
+                        killers[mover][cell] = analysis.killers(cells, cell, mover)
+
+    def _dilate(self, mask):
+        # Vecinas de todas las casillas de una máscara; solo se recalcula si la máscara cambia
+        result = self._dilations.get(mask)
+        if result is None:
+            masks = neighbor_masks(self.size)
+            result = 0
+            rest = mask
+            while rest:
+                low = rest & -rest
+                result |= masks[low.bit_length() - 1]
+                rest ^= low
+            if len(self._dilations) >= self.cache_entries:
+                self._dilations.popitem(last=False)
+            self._dilations[mask] = result
+        return result
+
+    def _roots(self, board, player_id):
+        # Raíces de los grupos del jugador, sin construir las listas de casillas
+        parent = board._parent
+        roots = []
+        mask = board.stones[player_id]
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            mask ^= low
+            if parent[idx] == idx:
+                roots.append(idx)
+        return roots
+
+    def _reach_mask(self, board, root, player_id, target):
+        # Libertades del grupo que, ocupadas, lo unen al borde objetivo
+        edges = board._edges
+        group_edges = edges[root]
+        libs = board._libs[root]
+        if group_edges & target:
+            return libs
+        cells = board._cells
+        flags = edge_flags(self.size)
+        neighbors = neighbor_table(self.size)
+        result = 0
+        rest = libs
+        while rest:
+            low = rest & -rest
+            idx = low.bit_length() - 1
+            rest ^= low
+            reached = flags[idx] | group_edges
+            for nb in neighbors[idx]:
+                if cells[nb] == player_id:
+                    reached |= edges[board._find(nb)]
+            if reached & target:
+                result |= low
+        return result
+
+    def _cell_weight(self, board, cell, player_id):
+        # Peso de una casilla vacía, igual a lo que le suma _weights pero mirando solo sus
+        # vecinas y las vecinas vacías de estas
+        from patterns import PatternEngine
+        size = self.size
+        opponent_id = 3 - player_id
+        cells = board._cells
+        edges = board._edges
+        find = board._find
+        neighbors = neighbor_table(size)
+        near = neighbors[cell]
+        own = set()
+        theirs = set()
+        own_edges = their_edges = 0
+        for nb in near:
+            value = cells[nb]
+            if value == player_id:
+                root = find(nb)
+                own.add(root)
+                own_edges |= edges[root]
+            elif value == opponent_id:
+                root = find(nb)
+                theirs.add(root)
+                their_edges |= edges[root]
+        if not own and not theirs:
+            return 0
+        flag = edge_flags(size)[cell]
+        weight = 0
+
+        # Portadores de grupos que ya unen sus dos bordes
+        for root in own:
+            if edges[root] & (TOP | BOTTOM) == TOP | BOTTOM:
+                weight += self.CARRIER_WEIGHT
+        for root in theirs:
+            if edges[root] & (LEFT | RIGHT) == LEFT | RIGHT:
+                weight += self.CARRIER_WEIGHT
+
+        # Bloqueos y conexiones a borde: la casilla lleva al grupo al borde objetivo
+        pairs = ((TOP, BOTTOM), (BOTTOM, TOP)) if player_id == 1 else ((LEFT, RIGHT), (RIGHT, LEFT))
+        reached = flag | their_edges
+        for root in theirs:
+            for edge, target in pairs:
+                if edges[root] & edge and reached & target:
+                    weight += self.CONNECT_WEIGHT
+        reached = flag | own_edges
+        for root in own:
+            if edges[root] & TOP and reached & BOTTOM:
+                weight += self.CONNECT_WEIGHT
+            if edges[root] & BOTTOM and reached & TOP:
+                weight += self.CONNECT_WEIGHT
+
+        # Grupos que alcanzan las vecinas vacías, para las uniones a distancia dos
+        second_own = set()
+        second_theirs = set()
+        for nb in near:
+            if cells[nb]:
+                continue
+            for far in neighbors[nb]:
+                value = cells[far]
+                if value == player_id:
+                    second_own.add(find(far))
+                elif value == opponent_id:
+                    second_theirs.add(find(far))
+
+        # Uniones de grupos rivales: libertad de dos, pareja vecina o portador de un puente
+        engine = PatternEngine.for_size(size)
+        bridges = engine.bridges
+        linked = len(theirs) >= 2 or (theirs and any(root not in theirs for root in second_theirs))
+        own_stones = board.stones[player_id]
+        if not linked:
+            for nb in near:
+                if cells[nb] != opponent_id:
+                    continue
+                for partner, carrier, c1, c2 in bridges[nb]:
+                    if ((c1 == cell or c2 == cell) and cells[partner] == opponent_id
+                            and not carrier & own_stones and find(nb) != find(partner)):
+                        linked = True
+                        break
+                if linked:
+                    break
+        if linked:
+            weight += self.LINK_WEIGHT
+
+        # Defensas: puentes propios invadidos y plantillas II invadidas
+        opponent_stones = board.stones[opponent_id]
+        templates = engine.edge_templates[player_id]
+        template_cells = engine.template_cells[player_id]
+        for nb in near:
+            if cells[nb] != player_id:
+                continue
+            for partner, _, c1, c2 in bridges[nb]:
+                if partner < nb or cells[partner] != player_id:
+                    continue
+                other = c2 if c1 == cell else c1 if c2 == cell else None
+                if other is not None and cells[other] == opponent_id and find(nb) != find(partner):
+                    weight += self.DEFEND_WEIGHT
+            if template_cells >> nb & 1:
+                group_edges = edges[find(nb)]
+                for edge, carrier, name in templates[nb]:
+                    if (name == "II" and carrier >> cell & 1 and not group_edges & edge
+                            and carrier & opponent_stones):
+                        weight += self.DEFEND_WEIGHT
+
+        # Uniones de un grupo propio de arriba con uno de abajo
+        if own:
+            second = own | second_own
+            for top in second:
+                if not edges[top] & TOP:
+                    continue
+                for bottom in second:
+                    if not edges[bottom] & BOTTOM:
+                        continue
+                    if (top in own and (bottom in own or bottom in second_own)) \
+                            or (bottom in own and top in second_own):
+                        weight += self.LINK_WEIGHT
+        return weight
+
+    def _weights(self, board, player_id):
+        # Suma el peso de cada motivo táctico sobre las casillas que lo cumplen
+        from patterns import PatternEngine
+        opponent_id = 3 - player_id
+        engine = PatternEngine.for_size(board.size)
+        edges = board._edges
+        libs = board._libs
+        own = self._roots(board, player_id)
+        theirs = self._roots(board, opponent_id)
+        weights = {}
+
+        def add(mask, weight):
+            while mask:
+                low = mask & -mask
+                idx = low.bit_length() - 1
+                mask ^= low
+                weights[idx] = weights.get(idx, 0) + weight
+
+        # Libertades de los grupos que ya unen arriba y abajo (propios) o izquierda y derecha (rivales)
+        for root in own:
+            if edges[root] & (TOP | BOTTOM) == TOP | BOTTOM:
+                add(libs[root], self.CARRIER_WEIGHT)
+        for root in theirs:
+            if edges[root] & (LEFT | RIGHT) == LEFT | RIGHT:
+                add(libs[root], self.CARRIER_WEIGHT)
+
+        # Bloqueos: libertades con las que un grupo rival alcanzaría el borde opuesto
+        if player_id == 1:
+            pairs = ((TOP, BOTTOM), (BOTTOM, TOP))
+        else:
+            pairs = ((LEFT, RIGHT), (RIGHT, LEFT))
+        for root in theirs:
+            for edge, target in pairs:
+                if edges[root] & edge:
+                    add(self._reach_mask(board, root, opponent_id, target), self.CONNECT_WEIGHT)
+
+        # Casillas que unen grupos rivales, incluidas las de sus puentes
+        add(engine.connection_mask(board, opponent_id, [libs[root] for root in theirs]),
+            self.LINK_WEIGHT)
+
+        # Respuestas a las invasiones de puentes y plantillas de borde propias
+        for _, _, reply in engine.threatened_bridges(board, player_id):
+            add(1 << reply, self.DEFEND_WEIGHT)
+        for reply in engine.threatened_edge_links(board, player_id):
+            add(1 << reply, self.DEFEND_WEIGHT)
+
+        # Grupos propios que tocan arriba o abajo: casillas que los llevan al otro borde
+        # y casillas que unen un grupo de arriba con uno de abajo
+        tops = [root for root in own if edges[root] & TOP]
+        bottoms = [root for root in own if edges[root] & BOTTOM]
+        for root in tops:
+            add(self._reach_mask(board, root, player_id, BOTTOM), self.CONNECT_WEIGHT)
+        for root in bottoms:
+            add(self._reach_mask(board, root, player_id, TOP), self.CONNECT_WEIGHT)
+        for top in tops:
+            top_libs = libs[top]
+            for bottom in bottoms:
+                bottom_libs = libs[bottom]
+                add((top_libs & bottom_libs) | (top_libs & self._dilate(bottom_libs))
+                    | (bottom_libs & self._dilate(top_libs)), self.LINK_WEIGHT)
+        return weights
+
+
+class SearchTimeout(Exception):
+    # Se lanza dentro de la búsqueda cuando se agota el tiempo de la jugada
+    pass
+
+
+class TimeManager:
+    def __init__(self, max_time: float, game_time: float = None, safety: float = 0.9):
+        # Reparte el tiempo de la partida (si lo hay) respetando el límite por jugada
+        self.max_time = max_time
+        self.game_time = game_time
+        self.safety = safety
+        self.remaining = game_time
+        self.start = 0.0
+        self.soft_limit = 0.0
+        self.hard_deadline = 0.0
+
+    def new_game(self):
+        # Restablece el presupuesto de la partida
+        self.remaining = self.game_time
+
+    def begin_move(self, empty_cells: int):
+        # Calcula el tiempo de esta jugada según las casillas vacías que quedan
+        self.start = time.time()
+        move_cap = self.max_time * self.safety
+        if self.remaining is None:
+            allotted = move_cap
+            hard = move_cap
+        else:
+            # Se estiman las jugadas propias restantes; las partidas suelen acabar antes de llenar el tablero
+            moves_left = max(4, empty_cells // 3)
+            allotted = min(move_cap, self.remaining / moves_left)
+            hard = min(move_cap, allotted * 2, self.remaining * 0.5)
+        # No se empieza otra profundidad si ya se gastó la mitad de lo asignado
+        self.soft_limit = self.start + allotted * 0.5
+        self.hard_deadline = self.start + hard
+
+    def end_move(self):
+        # Descuenta del presupuesto de la partida el tiempo usado en la jugada
+        if self.remaining is not None:
+            self.remaining = max(0.0, self.remaining - (time.time() - self.start))
+
+    def set_deadlines(self, soft_limit: float, hard_deadline: float):
+        # Fija directamente los límites de la jugada (lo usan los procesos de búsqueda)
+        self.start = time.time()
+        self.soft_limit = soft_limit
+        self.hard_deadline = hard_deadline
+
+    def stop_iterating(self) -> bool:
+        # Indica si no merece la pena empezar una iteración más profunda
+        return time.time() > self.soft_limit
+
+    def out_of_time(self) -> bool:
+        # Indica si se ha superado el límite duro de la jugada
+        return time.time() > self.hard_deadline
+
+    def can_finish(self, seconds: float) -> bool:
+        # Indica si algo que se estima en seconds segundos acabaría antes del límite duro
+        return time.time() + seconds <= self.hard_deadline
+
+
+class SearchStats:
+    # Funciones cuyo tiempo se mide cuando la instrumentación está activa
+    TIMED = ("evaluate_board", "generate_candidate_moves", "check_connection")
+
+    def __init__(self, size: int, move_number: int, empty_cells: int):
+        # Contadores y tiempos de una jugada; se rellenan durante play()
+        self.size = size
+        self.move_number = move_number
+        self.empty_cells = empty_cells
+        self.source = None
+        self.move = None
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.depth = 0
+        self.score = None
+        self.principal_variation = []
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.search = {}
+        self.solver_nodes = 0
+        self.solver_seconds = 0.0
+        self.ponder = None
+        self.eval_hits = 0
+        self.eval_misses = 0
+        self.seconds = dict.fromkeys(self.TIMED, 0.0)
+        self.calls = dict.fromkeys(self.TIMED, 0)
+        self._start = time.perf_counter()
+
+    def timed(self, name, function):
+        # Envuelve una función para acumular su tiempo y sus llamadas bajo un nombre
+        seconds = self.seconds
+        calls = self.calls
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+
+        return wrapper
+
+    def counted_probe(self, probe):
+        # Envuelve la consulta a la tabla de transposición para contar aciertos
+        def wrapper(key):
+            entry = probe(key)
+            self.tt_probes += 1
+            if entry is not None:
+                self.tt_hits += 1
+            return entry
+
+        return wrapper
+
+    def finish(self, move):
+        # Cierra la jugada con la casilla elegida y el tiempo total
+        self.move = move
+        self.elapsed = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        # Representación serializable en JSON para exportar las métricas
+        return {
+            "size": self.size,
+            "move_number": self.move_number,
+            "empty_cells": self.empty_cells,
+            "source": self.source,
+            "move": list(self.move) if self.move is not None else None,
+            "elapsed": self.elapsed,
+            "nodes": self.nodes,
+            "nps": self.nodes / self.elapsed if self.elapsed > 0 else 0.0,
+            "depth": self.depth,
+            "score": self.score,
+            "principal_variation": [list(move) for move in self.principal_variation],
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hits / self.tt_probes if self.tt_probes else 0.0,
+            "search": self.search,
+            "solver_nodes": self.solver_nodes,
+            "solver_seconds": self.solver_seconds,
+            "ponder": self.ponder,
+            "eval_hits": self.eval_hits,
+            "eval_misses": self.eval_misses,
+            "seconds": dict(self.seconds),
+            "calls": dict(self.calls),
+        }
+
+
+# Mayor profundidad para la que se comparte alfa entre procesos
+_MAX_SHARED_DEPTH = 128
+
+# Estado de cada proceso de búsqueda: alfa compartido por profundidad y motores persistentes
+_worker_alpha = None
+_worker_players = {}
+
+
+def _init_root_worker(shared_alpha):
+    # Inicializa un proceso de búsqueda con el arreglo de alfa compartido
+    global _worker_alpha
+    _worker_alpha = shared_alpha
+
+
+def _root_worker(task):
+    # Busca en un proceso un subconjunto de las jugadas de la raíz con los ajustes del
+    # jugador que reparte; devuelve (resultados, nodos, respuesta prevista por jugada)
+    (size, stones, player_id, moves, soft_limit, hard_deadline, max_depth,
+     deterministic, settings, node_limit) = task
+    if deterministic:
+        # Un motor nuevo por tarea: el resultado no depende de búsquedas anteriores
+        player = HexPlayer(player_id)
+    else:
+        player = _worker_players.get(player_id)
+        if player is None:
+            player = _worker_players[player_id] = HexPlayer(player_id)
+    player.apply_settings(settings)
+    player.deterministic = deterministic
+    player.node_limit = node_limit
+    board = HexBoard.from_stones(size, stones)
+    shared_alpha = None if deterministic else _worker_alpha
+    results = player.search_root_moves(board, moves, soft_limit, hard_deadline, max_depth, shared_alpha)
+    return results, player.nodes, player.root_replies(board, moves)
+
 
 class HexPlayer(Player):
-    def __init__(self, player_id: int, max_time: int=10):
+    # Modo de tableros grandes: desde cada tamaño, tope de candidatas por nodo, profundidad
+    # máxima y predicción del coste de la siguiente iteración para no empezar una que no
+    # acabaría a tiempo
+    SIZE_DEFAULTS = (
+        (19, {"max_candidates": 30, "max_depth": 8, "predict_iterations": True}),
+        (23, {"max_candidates": 24, "max_depth": 6, "predict_iterations": True}),
+    )
+    # Atributos que configuran la búsqueda y se envían a los procesos de búsqueda paralela
+    SEARCH_SETTINGS = ("use_two_distance", "use_inferior", "large_board", "batch_eval",
+                       "batch_min_moves", "batch_min_size")
+
+    def __init__(self, player_id: int, max_time: int=10, tt_megabytes: int=32, game_time: float=None,
+                 workers: int=1, deterministic: bool=False, seed: int=None, book_path: str=None,
+                 solver_cache: str=None, stats_callback=None, stats_path: str=None,
+                 ponder: bool=False, eval_cache_megabytes: int=16):
         # Inicializa un jugador de Hex con su ID y tiempo máximo de juego
         super().__init__(player_id)
+        # Instrumentación opcional por jugada (SearchStats), entregada a stats_callback y/o
+        # añadida como línea JSON a stats_path; desactivada no se envuelve ninguna función
+        self.instrument = stats_callback is not None or stats_path is not None
+        self.stats_callback = stats_callback
+        self.stats_path = stats_path
+        self.stats = None
+        self.last_stats = None
+        self.move_source = None
+        # Reflexión en el tiempo del rival: tras devolver la jugada, un hilo sigue buscando
+        # la posición de la respuesta prevista sobre la misma tabla de transposición
+        self.ponder = ponder
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._ponder_thread = None
+        self._ponder_reply = None
+        self.expected_reply = None
+        # La reflexión se detiene sola tras ponder_factor veces max_time, aunque nadie
+        # vuelva a llamar a play() (fin de la partida, jugador descartado)
+        self.ponder_factor = 4
+        # Búsqueda paralela en la raíz; en modo determinista las paradas se deciden por nodos
+        # y no por el reloj: el presupuesto de la jugada es max_time por deterministic_rate
+        # (nodos por segundo multiplicados por el lado del tablero, medido con margen),
+        # no se comparte alfa y el resolvedor tiene un tope de nodos. Con la misma semilla y
+        # procesos se obtiene la misma jugada mientras el límite duro del reloj, que se
+        # mantiene como seguro, no corte antes la búsqueda en una máquina mucho más lenta
+        self.workers = workers
+        self.deterministic = deterministic
+        self.deterministic_rate = 12000
+        self.node_limit = float('inf')
+        self.solver_max_nodes = 2000
+        self.rng = random.Random(seed)
+        self._pool = None
+        self._shared_alpha = None
         self.opponent_id = 3 - player_id
-        self.max_depth = 5
+        # Tope opcional de la profundización iterativa (None: hasta llenar el tablero)
+        self.max_depth = None
+        # Ajustes de SIZE_DEFAULTS para el tamaño actual; max_depth y max_candidates
+        # fijados a mano siguen valiendo como topes más estrictos
+        self.large_board = True
+        self.size_settings = {}
         self.max_time = max_time
-        self.directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]
+        self.time_manager = TimeManager(max_time, game_time)
+        self.directions = list(DIRECTIONS)
         self.start_time = 0
+        self.nodes = 0
+        self.depth_reached = 0
+        self.best_score = None
+        # Usa la métrica de dos distancias en lugar del camino más corto simple
+        self.use_two_distance = False
+        # La tabla de transposición se conserva entre llamadas a play() en la partida
+        self.tt = TranspositionTable(tt_megabytes)
+        self.tt_size = None
+        # Caché de evaluaciones de hojas por hash, conservada entre jugadas (0: sin caché)
+        self.eval_cache = EvalCache(eval_cache_megabytes) if eval_cache_megabytes else None
+        # Evaluación por lotes con NumPy de las hojas de cada nodo a profundidad 1, desde
+        # batch_min_moves hijas y en tableros de batch_min_size o más, donde compensa el coste
+        # fijo del lote; sin NumPy queda desactivada y se evalúa hoja a hoja
+        from vectorized import available
+        self.batch_eval = available()
+        self.batch_min_moves = 6
+        self.batch_min_size = 13
+        self.orderer = MoveOrderer()
+        # Puntuaciones estáticas por posición: cuestan cuatro recorridos del tablero, más que
+        # una hoja, así que solo se calculan en la raíz y a profundidad 2 o más y se memorizan
+        self.static_cache = OrderedDict()
+        self.static_cache_entries = 4096
+        # Candidatas memorizadas por posición; max_candidates acota el ancho de cada nodo
+        self.candidates = CandidateGenerator()
+        self.root_depth = 0
+        # Relleno de casillas capturadas y muertas en la raíz (inferior.py)
+        self.use_inferior = True
+        # Resolución exacta (solver.py) con solver_threshold casillas vacías o menos; dispone
+        # de una parte del tiempo y, si no demuestra una victoria, se busca como siempre
+        self.solver_threshold = 20
+        self.solver_share = 0.5
+        self.solver_cache = solver_cache
+        self.solver = None
+        self.solved_winner = None
+        # Jugadas de la raíz de la última búsqueda, de mejor a peor
+        self.root_moves = []
         self.use_symmetry = True
         self.first_move = None
+        # Libro de aperturas en disco (book.py); el diccionario cubre la primera jugada sin él
+        from book import OpeningBook
+        self.book = OpeningBook.open(book_path)
+        # Modelo de la partida: jugadas (fila, columna, jugador) en orden, piezas que había
+        # tras nuestra última jugada y última jugada del rival, para no recorrer el tablero
+        self.move_history = []
+        self.last_move = None
+        self._known_stones = None
         self.opening_book = {
             11: [(5, 5), (4, 5), (5, 4), (6, 5), (5, 6)],
             8: [(3, 3), (4, 3), (3, 4)],
@@ -55,129 +1247,753 @@ class HexPlayer(Player):
     def play(self, board: HexBoard):
         # Determina el mejor movimiento para el jugador en el tablero actual
         self.start_time = time.time()
-        
-        empty_cells = sum(row.count(0) for row in board.board)
+        predicted = self._stop_ponder()
+        
+        # Los grupos incrementales solo existen en HexBoard; otros tableros se convierten
+        if not isinstance(board, HexBoard):
+            board = HexBoard.from_matrix(board.board)
+        
+        new_game = self._sync_history(board)
+        empty_cells = board.empty_count()
+        if new_game or empty_cells >= board.size * board.size - 1:
+            self.time_manager.new_game()
+        ponder_result = None
+        if predicted is not None:
+            # En un acierto la tabla ya tiene la posición y la búsqueda arranca en caliente
+            if not new_game and self.last_move == predicted:
+                ponder_result = "hit"
+                self.ponder_hits += 1
+            else:
+                ponder_result = "miss"
+                self.ponder_misses += 1
+        self._apply_size_defaults(board.size)
+        stats = self._begin_stats(board, empty_cells) if self.instrument else None
+        if stats is not None:
+            stats.ponder = ponder_result
+        self.time_manager.begin_move(empty_cells)
+        if self.deterministic:
+            # El límite duro sigue valiendo como seguro; el blando lo sustituye el de nodos
+            self.time_manager.soft_limit = float('inf')
+            self.node_limit = self.node_budget(board.size)
+        try:
+            move = self._select_move(board, empty_cells)
+        finally:
+            self.time_manager.end_move()
+            if stats is not None:
+                self._end_stats()
+        self._record_own_move(board, move)
+        if stats is not None:
+            stats.finish(move)
+            self._emit_stats(stats)
+        if self.ponder:
+            self._start_ponder(board, move)
+        return move
+
+    def _apply_size_defaults(self, size):
+        # Toma los ajustes del mayor tamaño de SIZE_DEFAULTS que no supere al tablero
+        settings = {}
+        if self.large_board:
+            for min_size, values in self.SIZE_DEFAULTS:
+                if size >= min_size:
+                    settings = values
+        self.size_settings = settings
+        self.candidates.set_size_cap(settings.get("max_candidates"))
+
+    def _start_ponder(self, board, move):
+        # Lanza la reflexión sobre la posición tras nuestra jugada y la respuesta prevista;
+        # en modo determinista no, porque lo que llegara a buscar cambiaría la tabla
+        if self.workers > 1 or self.deterministic:
+            return
+        board = self._search_board(board)
+        board.place_piece(move[0], move[1], self.player_id)
+        if board.check_connection(self.player_id) or not board._empty:
+            return
+        reply = self.predict_reply(board)
+        board.place_piece(reply[0], reply[1], self.opponent_id)
+        if board.check_connection(self.opponent_id) or not board._empty:
+            return
+        # Los límites se fijan antes de arrancar el hilo para que una parada no se pierda
+        limit = time.time() + self.ponder_factor * self.max_time
+        self.time_manager.set_deadlines(limit, limit)
+        self._ponder_reply = reply
+        # El hilo busca con una copia superficial: comparte tabla, ordenación y reloj, pero
+        # no pisa los resultados de la jugada (nodes, depth_reached...) que se acaban de dar
+        ponderer = copy.copy(self)
+        self._ponder_thread = threading.Thread(target=ponderer._ponder, args=(board,), daemon=True)
+        self._ponder_thread.start()
+
+    def predict_reply(self, board):
+        # Respuesta prevista del rival: la de la variante principal, la de la tabla de
+        # transposición o la mejor candidata
+        reply = self.expected_reply
+        if reply is not None and board.board[reply[0]][reply[1]] == 0:
+            return reply
+        entry = self.tt.probe(board.hash)
+        if entry is not None and entry[3] is not None and board.board[entry[3][0]][entry[3][1]] == 0:
+            return entry[3]
+        candidates = self.generate_candidate_moves(board, self.static_move_scores(board), self.opponent_id)
+        return candidates[0] if candidates else board.get_possible_moves()[0]
+
+    def _ponder(self, board):
+        # Cuerpo del hilo: profundiza hasta que la siguiente llamada a play() lo detenga
+        candidate_moves = self.generate_candidate_moves(board, self.static_move_scores(board), self.player_id)
+        if not candidate_moves:
+            candidate_moves = board.get_possible_moves()
+        if len(candidate_moves) > 1:
+            self.iterative_deepening(board, candidate_moves)
+
+    def _stop_ponder(self):
+        # Detiene la reflexión en curso y devuelve la respuesta que se había previsto
+        thread = self._ponder_thread
+        if thread is None:
+            return None
+        # Con el límite duro vencido la búsqueda del hilo lanza SearchTimeout y termina
+        self.time_manager.soft_limit = 0.0
+        self.time_manager.hard_deadline = 0.0
+        thread.join()
+        self._ponder_thread = None
+        reply, self._ponder_reply = self._ponder_reply, None
+        return reply
+
+    def __del__(self):
+        # Un jugador descartado sin close() no deja la reflexión ocupando un núcleo; no se
+        # espera al hilo porque el recolector puede ejecutar esto desde él mismo
+        if getattr(self, "_ponder_thread", None) is not None:
+            self.time_manager.soft_limit = 0.0
+            self.time_manager.hard_deadline = 0.0
+
+    def _begin_stats(self, board, empty_cells):
+        # Activa los contadores de la jugada; los envoltorios solo existen en esta instancia
+        stats = self.stats = SearchStats(board.size, len(self.move_history) + 1, empty_cells)
+        self.evaluate_board = stats.timed("evaluate_board", self.evaluate_board)
+        self.generate_candidate_moves = stats.timed("generate_candidate_moves", self.generate_candidate_moves)
+        self.tt.probe = stats.counted_probe(self.tt.probe)
+        if self.eval_cache is not None:
+            stats.eval_hits = -self.eval_cache.hits
+            stats.eval_misses = -self.eval_cache.misses
+        return stats
+
+    def _end_stats(self):
+        # Retira los envoltorios para que las jugadas sin instrumentar no paguen nada
+        del self.evaluate_board
+        del self.generate_candidate_moves
+        del self.tt.probe
+        if self.eval_cache is not None:
+            self.stats.eval_hits += self.eval_cache.hits
+            self.stats.eval_misses += self.eval_cache.misses
+        self.stats.source = self.move_source
+        self.stats = None
+
+    def _emit_stats(self, stats):
+        # Entrega las estadísticas al callback y las añade como línea JSON al fichero
+        self.last_stats = stats
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+        if self.stats_path is not None:
+            with open(self.stats_path, "a") as handle:
+                handle.write(json.dumps(stats.to_dict()) + "\n")
+
+    def _record_search(self, board):
+        # Copia en las estadísticas el resultado de la búsqueda sobre el tablero de la raíz
+        stats = self.stats
+        if stats is None:
+            return
+        stats.nodes = self.nodes
+        stats.depth = self.depth_reached
+        # Sin ninguna profundidad completa no hay puntuación que dar
+        stats.score = self.best_score if self.depth_reached else None
+        stats.search = self.orderer.summary()
+        stats.principal_variation = self.principal_variation(board, self.depth_reached)
+
+    def principal_variation(self, board, length):
+        # Sigue desde la raíz las mejores jugadas guardadas en la tabla de transposición;
+        # consulta la tabla directamente para no contar como aciertos de la búsqueda
+        board = board.clone()
+        player_id = self.player_id
+        line = []
+        while len(line) < length:
+            key = board.hash ^ SIDE_KEY if player_id == self.player_id else board.hash
+            entry = TranspositionTable.probe(self.tt, key)
+            if entry is None or entry[3] is None:
+                break
+            r, c = entry[3]
+            if board.board[r][c] != 0:
+                break
+            line.append((r, c))
+            board.place_piece(r, c, player_id)
+            if board.check_connection(player_id):
+                break
+            player_id = 3 - player_id
+        return line
+
+    def _sync_history(self, board):
+        # Añade al historial las piezas nuevas desde la última llamada; devuelve True si
+        # el tablero no continúa la partida conocida y se empieza una nueva
+        size = board.size
+        stones = board.stones
+        known = self._known_stones
+        new_game = (known is None or known[0] != size
+                    or known[1] & ~stones[1] or known[2] & ~stones[2])
+        if new_game:
+            known = (size, 0, 0)
+            self.move_history = []
+            self.first_move = None
+            self.tt.clear()
+        
+        added = []
+        for player_id in (1, 2):
+            for r, c in bits_to_cells(stones[player_id] & ~known[player_id], size):
+                added.append((r, c, player_id))
+        self.move_history.extend(added)
+        if len(added) == 1 and added[0][2] == self.opponent_id:
+            self.last_move = added[0][:2]
+        else:
+            self.last_move = None
+        return new_game
+
+    def _record_own_move(self, board, move):
+        # Anota la jugada propia para que la siguiente llamada solo vea la del rival
+        size = board.size
+        stones = [size, board.stones[1], board.stones[2]]
+        stones[self.player_id] |= 1 << (move[0] * size + move[1])
+        self._known_stones = tuple(stones)
+        self.move_history.append((move[0], move[1], self.player_id))
+
+    def node_budget(self, size):
+        # Nodos que la búsqueda determinista puede gastar en una jugada de este tamaño
+        return max(1, int(self.max_time * self.time_manager.safety * self.deterministic_rate / size))
+
+    def _stop_iterating(self):
+        # Indica si no merece la pena empezar otra iteración: por el reloj o, en modo
+        # determinista, tras gastar la mitad del presupuesto de nodos
+        return self.time_manager.stop_iterating() or self.nodes * 2 > self.node_limit
+
+    def _can_finish(self, cost):
+        # Indica si una iteración que se estima en cost (nodos en modo determinista,
+        # segundos si no) acabaría dentro del presupuesto
+        if self.deterministic:
+            return self.nodes + cost <= self.node_limit
+        return self.time_manager.can_finish(cost)
+
+    def _select_move(self, board, empty_cells):
+        # Aplica libro de aperturas y simetría, que no cuestan nada, antes de recurrir al
+        # resolvedor y a la búsqueda
+        self.root_moves = []
+        self.expected_reply = None
+        # Sin búsqueda (libro, atajos o una sola candidata) no quedan cifras de la anterior
+        self.nodes = 0
+        self.depth_reached = 0
+        self.best_score = None
+        self.move_source = "book"
+        if self.book is not None:
+            move = self.book.lookup(board, self.player_id)
+            if move is not None:
+                return move
+        
+        self.move_source = "opening"
         if empty_cells == board.size * board.size:
             if board.size in self.opening_book:
-                return random.choice(self.opening_book[board.size])
+                return self.rng.choice(self.opening_book[board.size])
         
-        if self.use_symmetry:
+        self.move_source = "symmetry"
+        if self.use_symmetry and self.last_move is not None:
+            r, c = self.last_move
             if empty_cells == board.size * board.size - 1:
-                for r in range(board.size):
-                    for c in range(board.size):
-                        if board.board[r][c] != 0:
-                            self.first_move = (r, c)
-                            if r == board.size // 2 and c == board.size // 2:
-                                return (r, c+1)
-                            if board.size % 2 == 1 and board.board[board.size//2][board.size//2] == 0:
-                                return (board.size//2, board.size//2)
-                            else:
-                                return (c, r)
+                self.first_move = (r, c)
+                if r == board.size // 2 and c == board.size // 2:
+                    return (r, c+1)
+                if board.size % 2 == 1 and board.board[board.size//2][board.size//2] == 0:
+                    return (board.size//2, board.size//2)
+                else:
+                    return (c, r)
             
-            if self.first_move is not None:
-                last_move = None
-                for r in range(board.size):
-                    for c in range(board.size):
-                        if board.board[r][c] == self.opponent_id and all(
-                            board.board[nr][nc] != self.opponent_id 
-                            for nr, nc in self._get_neighbors(r, c) 
-                            if 0 <= nr < board.size and 0 <= nc < board.size
-                        ):
-                            last_move = (r, c)
-                            break
-                    if last_move:
-                        break
-                
-                if last_move:
-                    sym_move = (last_move[1], last_move[0])
-                    if 0 <= sym_move[0] < board.size and 0 <= sym_move[1] < board.size and board.board[sym_move[0]][sym_move[1]] == 0:
-                        return sym_move
+            if self.first_move is not None and board.board[c][r] == 0:
+                return (c, r)
         
-        candidate_moves = self.generate_candidate_moves(board)
+        self.solved_winner = None
+        self.move_source = "solver"
+        if empty_cells <= self.solver_threshold:
+            move = self._solve(board)
+            if move is not None:
+                return move
+        
+        candidate_moves = self.generate_candidate_moves(board, self.static_move_scores(board), self.player_id)
         
         if not candidate_moves:
             candidate_moves = board.get_possible_moves()
         
+        self.move_source = "search"
         if len(candidate_moves) == 1:
             return candidate_moves[0]
         
+        return self.iterative_deepening(board, candidate_moves)
+
+    def _solve(self, board):
+        # Intenta demostrar una victoria con la parte del tiempo reservada al resolvedor
+        from solver import DFPNSolver
+        if self.solver is None:
+            self.solver = DFPNSolver(cache_path=self.solver_cache)
+        now = time.time()
+        deadline = now + (self.time_manager.hard_deadline - now) * self.solver_share
+        max_nodes = self.solver_max_nodes if self.deterministic else None
+        result = self.solver.solve(self._search_board(board), self.player_id, deadline, max_nodes)
+        if self.stats is not None:
+            self.stats.solver_nodes = self.solver.nodes
+            self.stats.solver_seconds = time.time() - now
+        if result is None:
+            return None
+        self.solved_winner, move = result
+        if self.solved_winner == self.player_id:
+            return move
+        return None
+
+    def iterative_deepening(self, board, candidate_moves):
+        # Profundiza de uno en uno y devuelve la mejor jugada de la última profundidad completa
+        # La búsqueda juega y deshace sobre una única copia propia del tablero
+        board = self._search_board(board)
+        candidate_moves = self._fill_inferior(board, candidate_moves)
+        self.nodes = 0
+        self.depth_reached = 0
+        if self.tt_size != board.size:
+            self.tt.clear()
+            self.tt_size = board.size
+        self.tt.new_search()
+        self.orderer.new_search(board.size)
+        self.candidates.new_search(board.size)
+        self.candidates.set_root(board, self.player_id)
+        
+        key = board.hash ^ SIDE_KEY
+        entry = self.tt.probe(key)
+        moves = self.orderer.order(
+            candidate_moves, 0, self.player_id,
+            entry[3] if entry is not None else None,
+            self.static_move_scores(board),
+        )
+        best_move = moves[0]
+        
+        max_depth = board.empty_count()
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+        if self.size_settings.get("max_depth") is not None:
+            max_depth = min(max_depth, self.size_settings["max_depth"])
+        
+        if self.workers > 1 and len(moves) > 1:
+            best_move = self._parallel_search(board, moves, max_depth)
+            self._record_search(board)
+            return best_move
+        
+        # Arranque en caliente: si la búsqueda del turno anterior ya vio esta posición,
+        # sus entradas cubren las iteraciones poco profundas y se empieza por su profundidad
+        start_depth = 1
+        if entry is not None:
+            start_depth = max(1, min(entry[0], max_depth))
+            # Una entrada exacta (la deja, por ejemplo, la reflexión en el tiempo del rival)
+            # cuenta como iteración completa y se sigue por la siguiente profundidad
+            if entry[2] == EXACT and entry[3] in moves:
+                best_move = entry[3]
+                self.best_score = entry[1]
+                self.depth_reached = start_depth
+                start_depth = max_depth + 1 if abs(entry[1]) >= 1000 else start_depth + 1
+        depths = list(range(start_depth, max_depth + 1))
+        if depths and start_depth > 1 and self.depth_reached == 0:
+            # Sin iteración completa que heredar, una primera a profundidad 1, barata, deja
+            # una jugada buscada por si la del salto no acaba a tiempo
+            depths.insert(0, 1)
+
+        predict = self.size_settings.get("predict_iterations", False)
+        previous = None
+        for depth in depths:
+            nodes_before = self.nodes
+            iteration_start = time.time()
+            try:
+                move, score, scores = self._search_root(board, moves, depth)
+            except SearchTimeout:
+                break
+            
+            self.orderer.record_iteration(self.nodes - nodes_before)
+            best_move = move
+            self.best_score = score
+            self.depth_reached = depth
+            self.tt.store(key, depth, score, EXACT, move)
+            
+            if abs(score) >= 1000 or self._stop_iterating():
+                break
+            
+            # Una iteración incompleta se descarta: si al ritmo de crecimiento de las dos
+            # últimas (al menos el doble) la siguiente no acabaría, no se empieza. Tras la
+            # iteración previa al salto no hay ritmo que medir. En modo determinista el
+            # gasto se mide en nodos
+            if self.deterministic:
+                spent = self.nodes - nodes_before
+            else:
+                spent = time.time() - iteration_start
+            if predict and previous:
+                if not self._can_finish(spent * max(2.0, spent / previous)):
+                    break
+            previous = spent if depth >= start_depth else None
+            
+            # La siguiente iteración empieza por la variante principal y sigue por puntuación;
+            # tras la iteración previa al salto manda la jugada de la tabla, más profunda
+            first = move if depth >= start_depth or entry[3] not in moves else entry[3]
+            moves.sort(key=lambda m: (m != first, -scores[m]))
+        
+        self.root_moves = moves
+        line = self.principal_variation(board, 2)
+        self.expected_reply = line[1] if len(line) == 2 and line[0] == best_move else None
+        self._record_search(board)
+        return best_move
+
+    def _fill_inferior(self, board, candidate_moves):
+        # Rellena las regiones capturadas y las casillas muertas antes de buscar y quita
+        # de la raíz las candidatas rellenadas; se deshace si decidiría la partida
+        if not self.use_inferior:
+            return candidate_moves
+        from inferior import InferiorCells
+        analysis = InferiorCells.for_size(board.size)
+        placed = analysis.fill_in(board)
+        remaining = [move for move in candidate_moves if board.board[move[0]][move[1]] == 0]
+        if placed and (not remaining or not analysis.fill_is_safe(board)):
+            for _ in placed:
+                board.undo()
+            return candidate_moves
+        return remaining
+
+    def _search_root(self, board, moves, depth):
+        # Busca todas las jugadas de la raíz a una profundidad fija
+        self.root_depth = depth
         best_score = float('-inf')
         best_move = None
         alpha = float('-inf')
         beta = float('inf')
-        
-        for move in candidate_moves:
-            new_board = board.clone()
-            new_board.place_piece(move[0], move[1], self.player_id)
-            
-            score = self.minimax(new_board, self.max_depth - 1, alpha, beta, False)
+        scores = {}
+        
+        for move in moves:
+            # El finally deshace la jugada también cuando salta SearchTimeout, para que
+            # el tablero quede limpio para la variante principal y las estadísticas
+            board.place_piece(move[0], move[1], self.player_id)
+            try:
+                score = self.minimax(board, depth - 1, alpha, beta, False)
+            finally:
+                board.undo()
+            scores[move] = score
             
             if score > best_score:
                 best_score = score
                 best_move = move
             
             alpha = max(alpha, best_score)
+        
+        return best_move, best_score, scores
+
+    def search_root_moves(self, board, moves, soft_limit, hard_deadline, max_depth, shared_alpha=None):
+        # Profundiza sobre un subconjunto de jugadas de la raíz hasta los límites dados;
+        # devuelve {profundidad: {jugada: puntuación}} de las profundidades completadas
+        self.time_manager.set_deadlines(soft_limit, hard_deadline)
+        self._apply_size_defaults(board.size)
+        self.nodes = 0
+        if self.tt_size != board.size:
+            self.tt.clear()
+            self.tt_size = board.size
+        self.tt.new_search()
+        self.orderer.new_search(board.size)
+        self.candidates.new_search(board.size)
+        self.candidates.set_root(board, self.player_id)
+        
+        results = {}
+        moves = list(moves)
+        for depth in range(1, max_depth + 1):
+            self.root_depth = depth
+            scores = {}
+            alpha = float('-inf')
+            try:
+                for move in moves:
+                    if shared_alpha is not None and depth < _MAX_SHARED_DEPTH:
+                        alpha = max(alpha, shared_alpha[depth])
+                    board.place_piece(move[0], move[1], self.player_id)
+                    try:
+                        score = self.minimax(board, depth - 1, alpha, float('inf'), False)
+                    finally:
+                        board.undo()
+                    scores[move] = score
+                    if score > alpha:
+                        alpha = score
+                        if shared_alpha is not None and depth < _MAX_SHARED_DEPTH:
+                            with shared_alpha.get_lock():
+                                if score > shared_alpha[depth]:
+                                    shared_alpha[depth] = score
+            except SearchTimeout:
+                break
             
-            if time.time() - self.start_time > self.max_time * 0.9:
+            results[depth] = scores
+            if max(scores.values()) >= 1000 or self._stop_iterating():
                 break
+            moves.sort(key=lambda m: -scores[m])
         
-        if best_move is None:
-            return random.choice(board.get_possible_moves())
-            
+        return results
+
+    def _parallel_search(self, board, moves, max_depth):
+        # Reparte las jugadas de la raíz entre procesos y combina la profundidad común
+        pool = self._get_pool()
+        if not self.deterministic:
+            with self._shared_alpha.get_lock():
+                for depth in range(_MAX_SHARED_DEPTH):
+                    self._shared_alpha[depth] = float('-inf')
+        
+        manager = self.time_manager
+        stones = (0, board.stones[1], board.stones[2])
+        settings = self.search_settings()
+        futures = []
+        for worker in range(self.workers):
+            chunk = moves[worker::self.workers]
+            if chunk:
+                futures.append(pool.submit(_root_worker, (
+                    board.size, stones, self.player_id, chunk, manager.soft_limit,
+                    manager.hard_deadline, max_depth, self.deterministic, settings,
+                    self.node_limit,
+                )))
+        
+        # Los procesos respetan el límite duro; el margen cubre el envío de resultados
+        done, _ = wait(futures, timeout=max(0.0, manager.hard_deadline - time.time()) + 0.5)
+        results = [future.result() for future in futures if future in done]
+        
+        self.nodes = sum(nodes for _, nodes, _ in results)
+        self.depth_reached = min((max(result, default=0) for result, _, _ in results), default=0)
+        if self.depth_reached == 0:
+            return moves[0]
+        
+        scores = {}
+        replies = {}
+        for result, _, worker_replies in results:
+            scores.update(result[self.depth_reached])
+            replies.update(worker_replies)
+        # El orden de la raíz deshace los empates, así el resultado no depende del reparto
+        self.root_moves = sorted((move for move in moves if move in scores), key=lambda m: -scores[m])
+        best_move = self.root_moves[0]
+        self.best_score = scores[best_move]
+        self.tt.store(board.hash ^ SIDE_KEY, self.depth_reached, self.best_score, EXACT, best_move)
+        reply = replies.get(best_move)
+        if reply is not None and board.board[reply[0]][reply[1]] == 0:
+            self.expected_reply = reply
         return best_move
 
+    def search_settings(self) -> dict:
+        # Ajustes del jugador que cambian la búsqueda, para replicarlos en los procesos
+        settings = {name: getattr(self, name) for name in self.SEARCH_SETTINGS}
+        settings["max_candidates"] = self.candidates.max_candidates
+        return settings
+
+    def apply_settings(self, settings):
+        # Aplica los ajustes de search_settings(); max_candidates es del generador
+        for name, value in settings.items():
+            if name == "max_candidates":
+                self.candidates.max_candidates = value
+            else:
+                setattr(self, name, value)
+
+    def root_replies(self, board, moves):
+        # Respuesta del rival que la tabla de transposición guarda tras cada jugada dada
+        replies = {}
+        for move in moves:
+            board.place_piece(move[0], move[1], self.player_id)
+            entry = TranspositionTable.probe(self.tt, board.hash)
+            board.undo()
+            if entry is not None and entry[3] is not None:
+                replies[move] = entry[3]
+        return replies
+
+    def _get_pool(self):
+        # Crea la primera vez el conjunto de procesos de búsqueda y lo reutiliza
+        if self._pool is None:
+            self._shared_alpha = multiprocessing.Array('d', [float('-inf')] * _MAX_SHARED_DEPTH)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_root_worker,
+                initargs=(self._shared_alpha,),
+            )
+        return self._pool
+
+    def close(self):
+        # Detiene la reflexión y libera los procesos de búsqueda paralela
+        self._stop_ponder()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _search_board(self, board):
+        # Obtiene un HexBoard propio sobre el que hacer y deshacer jugadas
+        if isinstance(board, HexBoard):
+            board = board.clone()
+        else:
+            board = HexBoard.from_matrix(board.board)
+        if self.stats is not None:
+            board.check_connection = self.stats.timed("check_connection", board.check_connection)
+        return board
+
+    def static_move_scores(self, board):
+        # Puntúa cada casilla por cuánto se aleja del camino más corto de cualquiera de los dos
+        size = board.size
+        key = (size, board.hash)
+        scores = self.static_cache.get(key)
+        if scores is not None:
+            return scores
+        cells = board._cells
+        best = []
+        totals = []
+        for player_id in (1, 2):
+            start = self.edge_distance_map(board, player_id, False)
+            target = self.edge_distance_map(board, player_id, True)
+            total = [a + b - (value == 0) for a, b, value in zip(start, target, cells)]
+            totals.append(total)
+            best.append(min(total))
+        scores = [-min(a - best[0], b - best[1]) for a, b in zip(totals[0], totals[1])]
+        if len(self.static_cache) >= self.static_cache_entries:
+            self.static_cache.popitem(last=False)
+        self.static_cache[key] = scores
+        return scores
+
     def minimax(self, board, depth, alpha, beta, is_maximizing):
         # Implementa el algoritmo minimax con poda alfa-beta para evaluar movimientos
+        self.nodes += 1
         if board.check_connection(self.player_id):
             return 1000
         
         if board.check_connection(self.opponent_id):
             return -1000
         
-        if depth == 0 or time.time() - self.start_time > self.max_time * 0.9:
+        if self.time_manager.out_of_time() or self.nodes > self.node_limit:
+            raise SearchTimeout()
+        
+        if depth == 0:
             return self.evaluate_board(board)
         
-        candidate_moves = self.generate_candidate_moves(board)
+        key = board.hash ^ SIDE_KEY if is_maximizing else board.hash
+        entry = self.tt.probe(key)
+        if entry is not None and entry[0] >= depth:
+            value, flag = entry[1], entry[2]
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
+        
+        ply = self.root_depth - depth
+        mover = self.player_id if is_maximizing else self.opponent_id
+        # A profundidad 1 las hijas son hojas: ordenan la tabla, las asesinas y el historial
+        static_scores = self.static_move_scores(board) if depth >= 2 else None
+        candidate_moves = self.generate_candidate_moves(board, static_scores, mover)
         
         if not candidate_moves:
             candidate_moves = board.get_possible_moves()
         
+        if len(candidate_moves) > 1:
+            candidate_moves = self.orderer.order(
+                candidate_moves, ply, mover,
+                entry[3] if entry is not None else None,
+                static_scores,
+            )
+        
+        # A profundidad 1, si la primera hija no corta el nodo se espera recorrerlas todas:
+        # el resto de hojas se evalúa en un lote
+        prefetch = (depth == 1 and self.batch_eval and board.size >= self.batch_min_size
+                    and len(candidate_moves) > self.batch_min_moves)
+        searched = 0
         if is_maximizing:
             max_eval = float('-inf')
             for move in candidate_moves:
-                new_board = board.clone()
-                new_board.place_piece(move[0], move[1], self.player_id)
-                
-                eval = self.minimax(new_board, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval)
+                board.place_piece(move[0], move[1], self.player_id)
+                try:
+                    eval = self.minimax(board, depth - 1, alpha, beta, False)
+                finally:
+                    board.undo()
+                searched += 1
+                if eval > max_eval:
+                    max_eval = eval
+                    best_move = move
                 
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(move, ply, depth, mover, searched - 1)
                     break
-                
-                if time.time() - self.start_time > self.max_time * 0.9:
-                    break
-                    
-            return max_eval
+                if prefetch and searched == 1:
+                    self._prefetch_leaves(board, candidate_moves[1:], mover)
+            
+            best_value = max_eval
         else:
             min_eval = float('inf')
             for move in candidate_moves:
-                new_board = board.clone()
-                new_board.place_piece(move[0], move[1], self.opponent_id)
-                
-                eval = self.minimax(new_board, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval)
+                board.place_piece(move[0], move[1], self.opponent_id)
+                try:
+                    eval = self.minimax(board, depth - 1, alpha, beta, True)
+                finally:
+                    board.undo()
+                searched += 1
+                if eval < min_eval:
+                    min_eval = eval
+                    best_move = move
                 
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(move, ply, depth, mover, searched - 1)
                     break
-                
-                if time.time() - self.start_time > self.max_time * 0.9:
-                    break
-                    
-            return min_eval
+                if prefetch and searched == 1:
+                    self._prefetch_leaves(board, candidate_moves[1:], mover)
+            
+            best_value = min_eval
+        
+        self.orderer.record_node(searched)
+        
+        if best_move is not None:
+            if best_value <= alpha_orig:
+                flag = UPPER
+            elif best_value >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(key, depth, best_value, flag, best_move)
+        
+        return best_value
 
     def evaluate_board(self, board):
+        # Evalúa la posición consultando antes la caché de evaluaciones
+        cache = self.eval_cache
+        if cache is None:
+            return self.evaluate_position(board)
+        # La métrica de distancias cambia el valor: cada una tiene sus propias claves
+        key = board.hash ^ SIDE_KEY if self.use_two_distance else board.hash
+        score = cache.get(key)
+        if score is None:
+            score = self.evaluate_position(board)
+            cache.put(key, score)
+        return score
+
+    def _prefetch_leaves(self, board, moves, mover):
+        # Evalúa en un solo lote vectorizado (vectorized.py) las hojas hijas que no estén en
+        # la caché y las guarda en ella; evaluate_board las encontrará después
+        cache = self.eval_cache
+        if cache is None or self.use_two_distance or len(moves) < self.batch_min_moves:
+            return
+        from vectorized import BatchEvaluator
+        size = board.size
+        keys = zobrist_table(size)[mover]
+        pending = []
+        for move in moves:
+            key = board.hash ^ keys[move[0] * size + move[1]]
+            if key not in cache:
+                pending.append((key, move))
+        if len(pending) < self.batch_min_moves:
+            return
+        scores = BatchEvaluator.for_size(size).evaluate_children(
+            board, [move for _, move in pending], mover, self.player_id)
+        for (key, _), score in zip(pending, scores):
+            cache.put(key, score)
+
+    def evaluate_position(self, board):
         # Evalúa la posición actual del tablero para determinar qué tan favorable es
         player_groups = self.identify_groups(board, self.player_id)
         opponent_groups = self.identify_groups(board, self.opponent_id)
@@ -201,55 +2017,54 @@ class HexPlayer(Player):
 
     def identify_groups(self, board, player_id):
         # Identifica grupos conectados de piezas del mismo jugador
-        groups = []
-        visited = set()
-        
-        for r in range(board.size):
-            for c in range(board.size):
-                if board.board[r][c] == player_id and (r, c) not in visited:
-                    group = []
-                    self.dfs_group(board, r, c, player_id, visited, group)
-                    groups.append(group)
-        
-        return groups
+        # El tablero mantiene los grupos de forma incremental; no hace falta recorrerlo
+        return board.groups(player_id)
 
     def dfs_group(self, board, r, c, player_id, visited, group):
         # Realiza una búsqueda en profundidad para encontrar piezas conectadas
-        if (r, c) in visited or r < 0 or r >= board.size or c < 0 or c >= board.size or board.board[r][c] != player_id:
+        if not (0 <= r < board.size and 0 <= c < board.size):
             return
-        
-        visited.add((r, c))
-        group.append((r, c))
-        
-        for dr, dc in self.directions:
-            nr, nc = r + dr, c + dc
-            self.dfs_group(board, nr, nc, player_id, visited, group)
+        self._dfs_group(board, Geometry.for_size(board.size), r * board.size + c, player_id, visited, group)
+
+    def _dfs_group(self, board, geometry, idx, player_id, visited, group):
+        # Recorrido de dfs_group con pila explícita (sin límite de recursión en tableros
+        # grandes); las vecinas se apilan al revés para visitar en el mismo orden
+        cells = board._cells
+        coords = geometry.coords
+        neighbors = geometry.neighbors
+        stack = [idx]
+        while stack:
+            idx = stack.pop()
+            cell = coords[idx]
+            if cell in visited or cells[idx] != player_id:
+                continue
+            
+            visited.add(cell)
+            group.append(cell)
+            stack.extend(reversed(neighbors[idx]))
 
     def calculate_influence_region(self, board, groups, player_id):
         # Calcula la región de influencia de un jugador en el tablero
         influence = set()
         
         for group in groups:
-            for pos in group:
-                influence.add(pos)
-        
-        for group in groups:
-            for r, c in group:
-                for dr, dc in self.directions:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                        influence.add((nr, nc))
+            influence.update(group)
+            influence.update(bits_to_cells(group.liberties, board.size))
         
         return influence
 
     def calculate_connectivity(self, board, groups, player_id):
         # Calcula la conectividad de los grupos de un jugador con los bordes del tablero
+        # Un borde alcanzado mediante una plantilla cuenta como tocado
+        from patterns import PatternEngine
+        virtual = PatternEngine.for_size(board.size).virtual_edges(board, player_id)
         connectivity = 0
         
         if player_id == 2:
             for group in groups:
-                top_connected = any(pos[0] == 0 for pos in group)
-                bottom_connected = any(pos[0] == board.size - 1 for pos in group)
+                edges = group.edges | virtual.get(group.root, 0)
+                top_connected = edges & TOP
+                bottom_connected = edges & BOTTOM
                 
                 if top_connected and bottom_connected:
                     connectivity += 500
@@ -262,8 +2077,9 @@ class HexPlayer(Player):
         
         else:
             for group in groups:
-                left_connected = any(pos[1] == 0 for pos in group)
-                right_connected = any(pos[1] == board.size - 1 for pos in group)
+                edges = group.edges | virtual.get(group.root, 0)
+                left_connected = edges & LEFT
+                right_connected = edges & RIGHT
                 
                 if left_connected and right_connected:
                     connectivity += 500
@@ -278,164 +2094,182 @@ class HexPlayer(Player):
 
     def calculate_winning_potential(self, board, groups, player_id):
         # Evalúa el potencial de victoria basado en la longitud de los caminos más cortos
+        size = board.size
+        if self.use_two_distance:
+            start = self.two_distance_map(board, player_id, False)
+            target = self.two_distance_map(board, player_id, True)
+            best = min(
+                (a + b for a, b in zip(start, target) if a < _INF and b < _INF),
+                default=2 * size,
+            )
+            return size * max(0, 2 * size - best)
+        
+        # Un único 0-1 BFS desde el borde objetivo da la distancia de todas las casillas
+        distances = self.edge_distance_map(board, player_id, True)
+        cells = board._cells
         potential = 0
-        
-        if player_id == 2:
-            for c in range(board.size):
-                path_length = self.shortest_path_length(board, 0, c, board.size - 1, None, player_id)
-                if path_length > 0:
-                    potential += (board.size * 2 - path_length)
-        
-        else:
-            for r in range(board.size):
-                path_length = self.shortest_path_length(board, r, 0, None, board.size - 1, player_id)
+        for idx in edge_cells(size, player_id, False):
+            dist = distances[idx]
+            if dist < _INF:
+                # Como el Dijkstra original, no se cuenta la casilla de partida
+                path_length = dist - (cells[idx] == 0)
                 if path_length > 0:
-                    potential += (board.size * 2 - path_length)
+                    potential += (size * 2 - path_length)
         
         return potential
 
+    def edge_distance_map(self, board, player_id, target_edge):
+        # Calcula con un 0-1 BFS multiorigen la distancia de cada casilla a un borde del jugador
+        size = board.size
+        cells = board._cells
+        neighbors = neighbor_table(size)
+        dist = [_INF] * (size * size)
+        queue = deque()
+        
+        for idx in edge_cells(size, player_id, target_edge):
+            value = cells[idx]
+            if value == player_id:
+                dist[idx] = 0
+                queue.appendleft(idx)
+            elif value == 0:
+                dist[idx] = 1
+                queue.append(idx)
+        
+        while queue:
+            idx = queue.popleft()
+            d = dist[idx]
+            for nb in neighbors[idx]:
+                value = cells[nb]
+                if value == player_id:
+                    if d < dist[nb]:
+                        dist[nb] = d
+                        queue.appendleft(nb)
+                elif value == 0 and d + 1 < dist[nb]:
+                    dist[nb] = d + 1
+                    queue.append(nb)
+        
+        return dist
+
+    def two_distance_map(self, board, player_id, target_edge):
+        # Calcula la dos-distancia de cada casilla vacía a un borde: 1 + la segunda mejor vecina
+        size = board.size
+        n = size * size
+        cells = board._cells
+        neighbors = neighbor_table(size)
+        on_edge = set(edge_cells(size, player_id, target_edge))
+        
+        # Las piedras propias son transparentes: se agrupan y sus libertades pasan a ser vecinas
+        group_of = [-1] * n
+        group_libs = []
+        group_edge = []
+        for idx in range(n):
+            if cells[idx] != player_id or group_of[idx] >= 0:
+                continue
+            label = len(group_libs)
+            libs = set()
+            touches = False
+            group_of[idx] = label
+            stack = [idx]
+            while stack:
+                cur = stack.pop()
+                touches = touches or cur in on_edge
+                for nb in neighbors[cur]:
+                    value = cells[nb]
+                    if value == 0:
+                        libs.add(nb)
+                    elif value == player_id and group_of[nb] < 0:
+                        group_of[nb] = label
+                        stack.append(nb)
+            group_libs.append(libs)
+            group_edge.append(touches)
+        
+        dist = [_INF] * n
+        counts = [0] * n
+        frontier = []
+        for idx in range(n):
+            if cells[idx] != 0:
+                continue
+            if idx in on_edge or any(
+                group_of[nb] >= 0 and group_edge[group_of[nb]] for nb in neighbors[idx]
+            ):
+                dist[idx] = 1
+                frontier.append(idx)
+        
+        d = 1
+        while frontier:
+            next_frontier = []
+            for idx in frontier:
+                reached = set()
+                for nb in neighbors[idx]:
+                    value = cells[nb]
+                    if value == 0:
+                        reached.add(nb)
+                    elif value == player_id:
+                        reached.update(group_libs[group_of[nb]])
+                reached.discard(idx)
+                for nb in reached:
+                    if dist[nb] == _INF:
+                        counts[nb] += 1
+                        if counts[nb] == 2:
+                            dist[nb] = d + 1
+                            next_frontier.append(nb)
+            frontier = next_frontier
+            d += 1
+        
+        return dist
+
     def shortest_path_length(self, board, start_r, start_c, target_r, target_c, player_id):
         # Encuentra la longitud del camino más corto entre dos puntos
-        import heapq
-        
-        queue = [(0, start_r, start_c)]
-        visited = set()
+        # Con costes 0 (propia) y 1 (vacía) basta un 0-1 BFS sobre índices planos
+        geometry = Geometry.for_size(board.size)
+        coords = geometry.coords
+        neighbors = geometry.neighbors
+        cells = board._cells
+        start = start_r * board.size + start_c
+        dist = {start: 0}
+        done = set()
+        queue = deque([start])
         
         while queue:
-            dist, r, c = heapq.heappop(queue)
-            
-            if (r, c) in visited:
+            idx = queue.popleft()
+            if idx in done:
                 continue
+            done.add(idx)
+            d = dist[idx]
+            r, c = coords[idx]
             
-            visited.add((r, c))
-            
-            if (target_r is not None and r == target_r and 
-                target_c is not None and c == target_c):
-                return dist
-            elif target_r is not None and r == target_r and target_c is None:
-                return dist
-            elif target_r is None and target_c is not None and c == target_c:
-                return dist
+            if (target_r is None or r == target_r) and (target_c is None or c == target_c) \
+                    and (target_r is not None or target_c is not None):
+                return d
             
-            for dr, dc in self.directions:
-                nr, nc = r + dr, c + dc
-                
-                if 0 <= nr < board.size and 0 <= nc < board.size and (nr, nc) not in visited:
-                    if board.board[nr][nc] == player_id:
-                        cost = 0
-                    elif board.board[nr][nc] == 0:
-                        cost = 1
-                    else:
-                        continue
-                    
-                    heapq.heappush(queue, (dist + cost, nr, nc))
+            for nb in neighbors[idx]:
+                value = cells[nb]
+                if nb in done or (value != player_id and value != 0):
+                    continue
+                if value == player_id:
+                    if d < dist.get(nb, _INF):
+                        dist[nb] = d
+                        queue.appendleft(nb)
+                elif d + 1 < dist.get(nb, _INF):
+                    dist[nb] = d + 1
+                    queue.append(nb)
         
         return -1
 
     def find_carriers(self, board, group, player_id):
         # Encuentra casillas vacías adyacentes a un grupo que pueden extender la conexión
-        carriers = set()
-        
-        for r, c in group:
-            for dr, dc in self.directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                    carriers.add((nr, nc))
-        
-        return carriers
+        return set(bits_to_cells(group.liberties, board.size))
 
-    def generate_candidate_moves(self, board):
-        # Genera una lista de movimientos candidatos basados en la estrategia
-        candidates = set()
-        
-        player_groups = self.identify_groups(board, self.player_id)
-        opponent_groups = self.identify_groups(board, self.opponent_id)
-        
-        player_topbottom = self.find_topbottom_groups(board, player_groups, self.player_id)
-        opponent_leftright = self.find_leftright_groups(board, opponent_groups, self.opponent_id)
-        
-        for group in player_topbottom:
-            carriers = self.find_carriers(board, group, self.player_id)
-            candidates.update(carriers)
-        
-        for group in opponent_leftright:
-            carriers = self.find_carriers(board, group, self.opponent_id)
-            candidates.update(carriers)
-        
-        if self.player_id == 1:
-            opponent_top_groups = self.find_top_groups(board, opponent_groups, self.opponent_id)
-            opponent_bottom_groups = self.find_bottom_groups(board, opponent_groups, self.opponent_id)
-            
-            for group in opponent_top_groups:
-                blocking_moves = self.find_one_to_connect(board, group, self.opponent_id, "bottom")
-                candidates.update(blocking_moves)
-            
-            for group in opponent_bottom_groups:
-                blocking_moves = self.find_one_to_connect(board, group, self.opponent_id, "top")
-                candidates.update(blocking_moves)
-        else:
-            opponent_left_groups = self.find_left_groups(board, opponent_groups, self.opponent_id)
-            opponent_right_groups = self.find_right_groups(board, opponent_groups, self.opponent_id)
-            
-            for group in opponent_left_groups:
-                blocking_moves = self.find_one_to_connect(board, group, self.opponent_id, "right")
-                candidates.update(blocking_moves)
-            
-            for group in opponent_right_groups:
-                blocking_moves = self.find_one_to_connect(board, group, self.opponent_id, "left")
-                candidates.update(blocking_moves)
-        
-        for group1 in opponent_groups:
-            for group2 in opponent_groups:
-                if group1 != group2:
-                    blocking_moves = self.find_connecting_moves(board, group1, group2, self.opponent_id)
-                    candidates.update(blocking_moves)
-        
-        virtual_connections = self.find_virtual_connections(board, opponent_groups, self.opponent_id)
-        candidates.update(virtual_connections)
-        
-        top_groups = self.find_top_groups(board, player_groups, self.player_id)
-        bottom_groups = self.find_bottom_groups(board, player_groups, self.player_id)
-        
-        for group in top_groups:
-            one_to_connect = self.find_one_to_connect(board, group, self.player_id, "bottom")
-            candidates.update(one_to_connect)
-        
-        for group in bottom_groups:
-            one_to_connect = self.find_one_to_connect(board, group, self.player_id, "top")
-            candidates.update(one_to_connect)
-        
-        for top_group in top_groups:
-            for bottom_group in bottom_groups:
-                connecting_moves = self.find_connecting_moves(board, top_group, bottom_group, self.player_id)
-                candidates.update(connecting_moves)
-        
-        if candidates:
-            return list(candidates)
-        
-        near_existing = set()
-        for r in range(board.size):
-            for c in range(board.size):
-                if board.board[r][c] == self.player_id:
-                    for dr, dc in self.directions:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                            near_existing.add((nr, nc))
-        
-        if near_existing:
-            return list(near_existing)
-        
-        return board.get_possible_moves()
+    def generate_candidate_moves(self, board, static_scores=None, mover=None):
+        # Genera una lista acotada de movimientos candidatos, ordenada por su motivo táctico
+        return self.candidates.generate(board, self.player_id, static_scores, mover)
 
     def find_topbottom_groups(self, board, groups, player_id):
         # Encuentra grupos que conectan los bordes superior e inferior
         topbottom_groups = []
         
         for group in groups:
-            top_connected = any(pos[0] == 0 for pos in group)
-            bottom_connected = any(pos[0] == board.size - 1 for pos in group)
-            
-            if top_connected and bottom_connected:
+            if group.edges & (TOP | BOTTOM) == TOP | BOTTOM:
                 topbottom_groups.append(group)
         
         return topbottom_groups
@@ -445,10 +2279,7 @@ class HexPlayer(Player):
         leftright_groups = []
         
         for group in groups:
-            left_connected = any(pos[1] == 0 for pos in group)
-            right_connected = any(pos[1] == board.size - 1 for pos in group)
-            
-            if left_connected and right_connected:
+            if group.edges & (LEFT | RIGHT) == LEFT | RIGHT:
                 leftright_groups.append(group)
         
         return leftright_groups
@@ -458,7 +2289,7 @@ class HexPlayer(Player):
         left_groups = []
         
         for group in groups:
-            if any(pos[1] == 0 for pos in group):
+            if group.edges & LEFT:
                 left_groups.append(group)
         
         return left_groups
@@ -468,7 +2299,7 @@ class HexPlayer(Player):
         right_groups = []
         
         for group in groups:
-            if any(pos[1] == board.size - 1 for pos in group):
+            if group.edges & RIGHT:
                 right_groups.append(group)
         
         return right_groups
@@ -478,7 +2309,7 @@ class HexPlayer(Player):
         top_groups = []
         
         for group in groups:
-            if any(pos[0] == 0 for pos in group):
+            if group.edges & TOP:
                 top_groups.append(group)
         
         return top_groups
@@ -488,195 +2319,99 @@ class HexPlayer(Player):
         bottom_groups = []
         
         for group in groups:
-            if any(pos[0] == board.size - 1 for pos in group):
+            if group.edges & BOTTOM:
                 bottom_groups.append(group)
         
         return bottom_groups
 
     def is_connected_to_left(self, board, r, c, player_id):
         # Verifica si una posición está conectada al borde izquierdo
-        visited = set()
-        return self._is_connected_to_edge(board, r, c, player_id, visited, lambda pos: pos[1] == 0)
+        return board.board[r][c] == player_id and bool(board.group_edges(r, c) & LEFT)
 
     def is_connected_to_right(self, board, r, c, player_id):
         # Verifica si una posición está conectada al borde derecho
-        visited = set()
-        return self._is_connected_to_edge(board, r, c, player_id, visited, lambda pos: pos[1] == board.size - 1)
+        return board.board[r][c] == player_id and bool(board.group_edges(r, c) & RIGHT)
 
     def find_virtual_connections(self, board, groups, player_id):
-        # Encuentra conexiones virtuales entre grupos
-        virtual_connections = set()
-        
-        for group in groups:
-            for r, c in group:
-                for dr1, dc1 in self.directions:
-                    nr1, nc1 = r + dr1, c + dc1
-                    if 0 <= nr1 < board.size and 0 <= nc1 < board.size and board.board[nr1][nc1] == 0:
-                        for dr2, dc2 in self.directions:
-                            nr2, nc2 = nr1 + dr2, nc1 + dc2
-                            if 0 <= nr2 < board.size and 0 <= nc2 < board.size and board.board[nr2][nc2] == 0:
-                                test_board = board.clone()
-                                test_board.place_piece(nr1, nc1, player_id)
-                                test_board.place_piece(nr2, nc2, player_id)
-                                
-                                new_groups = self.identify_groups(test_board, player_id)
-                                if len(new_groups) < len(groups):
-                                    virtual_connections.add((nr1, nc1))
-                                    virtual_connections.add((nr2, nc2))
-        
-        for group in groups:
-            for r, c in group:
-                for i in range(4):
-                    if i == 0:
-                        nr1, nc1 = r - 1, c - 1
-                        nr2, nc2 = r + 1, c + 1
-                    elif i == 1:
-                        nr1, nc1 = r - 1, c + 1
-                        nr2, nc2 = r + 1, c - 1
-                    elif i == 2:
-                        nr1, nc1 = r, c - 1
-                        nr2, nc2 = r, c + 1
-                    else:
-                        nr1, nc1 = r - 1, c
-                        nr2, nc2 = r + 1, c
-                    
-                    if (0 <= nr1 < board.size and 0 <= nc1 < board.size and 
-                        0 <= nr2 < board.size and 0 <= nc2 < board.size and
-                        board.board[nr1][nc1] == 0 and board.board[nr2][nc2] == 0):
-                        
-                        for pos in [(nr1, nc1), (nr2, nc2)]:
-                            test_board = board.clone()
-                            test_board.place_piece(pos[0], pos[1], player_id)
-                            
-                            if self.creates_strong_connection(test_board, pos, player_id, groups):
-                                virtual_connections.add(pos)
-        
-        return virtual_connections
-
-    def creates_strong_connection(self, board, pos, player_id, original_groups):
-        # Determina si un movimiento crea una conexión fuerte entre grupos
-        new_groups = self.identify_groups(board, player_id)
-        
-        if len(new_groups) < len(original_groups):
-            return True
-        
-        connected_to_groups = 0
-        r, c = pos
-        for dr, dc in self.directions:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == player_id:
-                for i, group in enumerate(original_groups):
-                    if any(pos == (nr, nc) for pos in group):
-                        connected_to_groups += 1
-                        break
-        
-        return connected_to_groups >= 2
+        # Encuentra conexiones virtuales entre grupos con las tablas de patrones, sin clonar
+        from patterns import PatternEngine
+        return PatternEngine.for_size(board.size).connection_cells(board, player_id, groups)
 
     def is_connected_to_top(self, board, r, c, player_id):
         # Verifica si una posición está conectada al borde superior
-        visited = set()
-        return self._is_connected_to_edge(board, r, c, player_id, visited, lambda pos: pos[0] == 0)
+        return board.board[r][c] == player_id and bool(board.group_edges(r, c) & TOP)
 
     def is_connected_to_bottom(self, board, r, c, player_id):
         # Verifica si una posición está conectada al borde inferior
-        visited = set()
-        return self._is_connected_to_edge(board, r, c, player_id, visited, lambda pos: pos[0] == board.size - 1)
+        return board.board[r][c] == player_id and bool(board.group_edges(r, c) & BOTTOM)
 
     def _is_connected_to_edge(self, board, r, c, player_id, visited, edge_condition):
         # Función auxiliar para verificar conexiones con los bordes
-        if (r, c) in visited:
-            return False
-        
-        if board.board[r][c] != player_id:
-            return False
-        
-        if edge_condition((r, c)):
-            return True
-        
-        visited.add((r, c))
-        
-        for dr, dc in self.directions:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < board.size and 0 <= nc < board.size:
-                if self._is_connected_to_edge(board, nr, nc, player_id, visited, edge_condition):
-                    return True
+        geometry = Geometry.for_size(board.size)
+        return self._reaches_edge(board, geometry, r * board.size + c, player_id, visited, edge_condition)
+
+    def _reaches_edge(self, board, geometry, idx, player_id, visited, edge_condition):
+        # Recorrido de _is_connected_to_edge con pila explícita, en el mismo orden
+        cells = board._cells
+        coords = geometry.coords
+        neighbors = geometry.neighbors
+        stack = [idx]
+        while stack:
+            idx = stack.pop()
+            cell = coords[idx]
+            if cell in visited or cells[idx] != player_id:
+                continue
+            
+            if edge_condition(cell):
+                return True
+            
+            visited.add(cell)
+            stack.extend(reversed(neighbors[idx]))
         
         return False
 
     def find_connecting_moves(self, board, group1, group2, player_id):
         # Encuentra movimientos que pueden conectar dos grupos
-        connecting_moves = set()
-        
-        adjacent1 = set()
-        for r, c in group1:
-            for dr, dc in self.directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                    adjacent1.add((nr, nc))
-        
-        adjacent2 = set()
-        for r, c in group2:
-            for dr, dc in self.directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                    adjacent2.add((nr, nc))
-        
-        common_adjacent = adjacent1.intersection(adjacent2)
-        connecting_moves.update(common_adjacent)
-        
-        for pos1 in adjacent1:
-            for pos2 in adjacent2:
-                if self.are_adjacent(pos1, pos2):
-                    connecting_moves.add(pos1)
-                    connecting_moves.add(pos2)
-        
-        return connecting_moves
+        # Casillas vacías vecinas de ambos grupos, más las parejas de vecinas de uno y otro
+        # que se tocan entre sí; todo con máscaras de bits
+        geometry = Geometry.for_size(board.size)
+        empty = ~(board.stones[1] | board.stones[2])
+        adjacent1 = geometry.dilate(geometry.cells_mask(group1)) & empty
+        adjacent2 = geometry.dilate(geometry.cells_mask(group2)) & empty
+        
+        connecting = adjacent1 & adjacent2
+        connecting |= adjacent1 & geometry.dilate(adjacent2)
+        connecting |= adjacent2 & geometry.dilate(adjacent1)
+        return set(bits_to_cells(connecting, board.size))
 
     def are_adjacent(self, pos1, pos2):
         # Verifica si dos posiciones son adyacentes
-        r1, c1 = pos1
-        r2, c2 = pos2
-        
-        for dr, dc in self.directions:
-            if r1 + dr == r2 and c1 + dc == c2:
-                return True
-        
-        return False
+        return adjacent(pos1, pos2)
 
     def _get_neighbors(self, r, c):
-        # Obtiene las posiciones vecinas de una celda
-        neighbors = []
-        for dr, dc in self.directions:
-            neighbors.append((r + dr, c + dc))
-        return neighbors
+        # Obtiene las posiciones vecinas de una celda (sin conocer el tamaño, no se recortan)
+        return [(r + dr, c + dc) for dr, dc in DIRECTIONS]
 
     def find_one_to_connect(self, board, group, player_id, target):
         # Encuentra movimientos que conectan un grupo a un borde específico
         one_to_connect = set()
         
-        temp_board = board.clone()
-        
-        for r, c in group:
-            temp_board.board[r][c] = player_id
-        
-        adjacent_empty = set()
-        for r, c in group:
-            for dr, dc in self.directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < board.size and 0 <= nc < board.size and board.board[nr][nc] == 0:
-                    adjacent_empty.add((nr, nc))
+        geometry = Geometry.for_size(board.size)
+        empty = ~(board.stones[1] | board.stones[2])
+        adjacent_empty = bits_to_cells(geometry.dilate(geometry.cells_mask(group)) & empty, board.size)
         
         for r, c in adjacent_empty:
-            test_board = temp_board.clone()
-            test_board.place_piece(r, c, player_id)
+            board.place_piece(r, c, player_id)
             
-            if target == "top" and self.is_connected_to_top(test_board, r, c, player_id):
+            if target == "top" and self.is_connected_to_top(board, r, c, player_id):
                 one_to_connect.add((r, c))
-            elif target == "bottom" and self.is_connected_to_bottom(test_board, r, c, player_id):
+            elif target == "bottom" and self.is_connected_to_bottom(board, r, c, player_id):
                 one_to_connect.add((r, c))
-            elif target == "left" and self.is_connected_to_left(test_board, r, c, player_id):
+            elif target == "left" and self.is_connected_to_left(board, r, c, player_id):
                 one_to_connect.add((r, c))
-            elif target == "right" and self.is_connected_to_right(test_board, r, c, player_id):
+            elif target == "right" and self.is_connected_to_right(board, r, c, player_id):
                 one_to_connect.add((r, c))
+            
+            board.undo()
         
         return one_to_connect
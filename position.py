@@ -0,0 +1,85 @@
+import base64
+
+from player import HexBoard
+
+# Registro binario de una posición: tamaño, jugador al que le toca y dos bits por casilla
+# (0 vacía, 1 y 2 las piezas de cada jugador), cuatro casillas por byte empezando por el
+# bit menos significativo, en el orden de los índices planos
+_HEADER_BYTES = 2
+
+
+def record_length(size: int) -> int:
+    # Bytes que ocupa el registro de una posición del tamaño dado
+    return _HEADER_BYTES + (size * size + 3) // 4
+
+
+def side_to_move(board) -> int:
+    # Jugador al que le toca, suponiendo que empieza el 1 y no hay intercambio
+    return 1 if bin(board.stones[1]).count("1") <= bin(board.stones[2]).count("1") else 2
+
+
+def encode(board, to_move: int = None) -> bytes:
+    # Codifica un HexBoard (o un tablero con matriz board) como registro binario
+    if not isinstance(board, HexBoard):
+        board = HexBoard.from_matrix(board.board)
+    if to_move is None:
+        to_move = side_to_move(board)
+    if to_move not in (1, 2) or not 0 < board.size < 256:
+        raise ValueError("tamaño o jugador fuera de rango")
+    cells = board._cells
+    n = len(cells)
+    packed = bytearray(record_length(board.size))
+    packed[0] = board.size
+    packed[1] = to_move
+    for i in range(0, n, 4):
+        quad = cells[i:i + 4]
+        value = 0
+        for shift, cell in enumerate(quad):
+            value |= cell << (2 * shift)
+        packed[_HEADER_BYTES + i // 4] = value
+    return bytes(packed)
+
+
+def decode(data: bytes):
+    # Reconstruye (tablero, jugador al que le toca) a partir de un registro binario
+    if len(data) < _HEADER_BYTES:
+        raise ValueError("registro de posición truncado")
+    size, to_move = data[0], data[1]
+    if not size or to_move not in (1, 2) or len(data) != record_length(size):
+        raise ValueError("registro de posición inválido")
+    n = size * size
+    stones = [0, 0, 0]
+    for i in range(n):
+        value = (data[_HEADER_BYTES + i // 4] >> (2 * (i % 4))) & 3
+        if value == 3:
+            raise ValueError("registro de posición inválido")
+        if value:
+            stones[value] |= 1 << i
+    return HexBoard.from_stones(size, stones), to_move
+
+
+def to_string(board, to_move: int = None) -> str:
+    # Forma de texto del registro para los logs: base64 apto para URL y sin relleno
+    return base64.urlsafe_b64encode(encode(board, to_move)).rstrip(b"=").decode("ascii")
+
+
+def from_string(text: str):
+    # Inverso de to_string
+    text = text.strip()
+    try:
+        data = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+    except ValueError:
+        raise ValueError("posición en texto inválida") from None
+    return decode(data)
+
+
+def read_records(stream):
+    # Lee perezosamente registros binarios concatenados de un fichero abierto en modo binario
+    while True:
+        header = stream.read(_HEADER_BYTES)
+        if not header:
+            return
+        if len(header) < _HEADER_BYTES:
+            raise ValueError("registro de posición truncado")
+        body = stream.read(record_length(header[0]) - _HEADER_BYTES)
+        yield header + body
@@ -0,0 +1,397 @@
+import sys
+import json
+import time
+import zlib
+import asyncio
+import argparse
+import multiprocessing
+
+from player import HexBoard
+from tournament import DEFAULT_ENGINE, make_player
+
+# Opciones que el servicio impone a cada motor: la paralelización es entre partidas, así que
+# nada de procesos propios ni de un hilo de reflexión compitiendo con otras partidas
+FORCED_OPTIONS = {"workers": 1, "ponder": False}
+# Memoria por partida por defecto, más modesta que la de un jugador suelto porque un
+# proceso de búsqueda aloja muchas partidas a la vez
+DEFAULT_OPTIONS = {"tt_megabytes": 8, "eval_cache_megabytes": 4}
+
+
+def _move_report(player, move):
+    # Respuesta de una jugada; profundidad y nodos solo si salió de la búsqueda, porque con
+    # libro, resolvedor, apertura o simetría serían los de la búsqueda anterior
+    source = getattr(player, "move_source", "search")
+    searched = source == "search"
+    return ("move", (int(move[0]), int(move[1])),
+            getattr(player, "depth_reached", None) if searched else None,
+            getattr(player, "nodes", None) if searched else None, source)
+
+
+def _worker_main(conn, engine):
+    # Bucle de un proceso de búsqueda: conserva un jugador por partida (tabla de
+    # transposición, historial, cachés) y responde a cada petición de jugada.
+    # Un primer jugador desechable carga los módulos que el motor importa al crearse,
+    # para que ese coste no caiga en el límite de la primera jugada
+    make_player({"factory": engine, "options": dict(FORCED_OPTIONS)}, 1, 1.0, 0).close()
+    conn.send(("ready",))
+    players = {}
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task[0] == "close":
+            player = players.pop(task[1], None)
+            if player is not None and hasattr(player, "close"):
+                player.close()
+            continue
+        _, game, spec, player_id, size, moves, budget, seed = task
+        try:
+            player = players.get(game)
+            if player is None:
+                player = players[game] = make_player(spec, player_id, budget, seed)
+            # El presupuesto de la jugada es lo que queda hasta el límite de la partida
+            player.max_time = budget
+            manager = getattr(player, "time_manager", None)
+            if manager is not None:
+                manager.max_time = budget
+            board = HexBoard(size)
+            for r, c, owner in moves:
+                board.place_piece(r, c, owner)
+            move = player.play(board)
+            conn.send(_move_report(player, move))
+        except Exception as error:
+            players.pop(game, None)
+            conn.send(("error", f"{type(error).__name__}: {error}"))
+
+
+class SearchWorker:
+    # Proceso de búsqueda con las partidas asignadas; atiende una jugada cada vez
+    # Se arranca con spawn: el servicio tiene hilos vivos cuando reinicia un proceso
+    context = multiprocessing.get_context("spawn")
+
+    def __init__(self, index: int, engine: str):
+        self.index = index
+        self.engine = engine
+        self.games = set()
+        self.lock = asyncio.Lock()
+        self.process = None
+        self.conn = None
+        self.warming = False
+        self.closing = []
+        self.restarts = 0
+
+    def start(self):
+        # Lanza el proceso con un extremo de la tubería
+        self.conn, child = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_main, args=(child, self.engine), daemon=True)
+        self.process.start()
+        child.close()
+        self.warming = True
+
+    def wait_ready(self):
+        # Espera a que el proceso termine de cargar el motor
+        if self.warming:
+            self.conn.recv()
+            self.warming = False
+
+    def stop(self):
+        # Mata el proceso; las partidas pierden el estado caliente y se recrean al volver
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+            self.process = None
+            self.conn = None
+
+    def forget(self, game):
+        # Libera en el proceso el jugador de una partida terminada; si hay una búsqueda en
+        # curso, el aviso sale justo antes de la siguiente petición
+        self.games.discard(game)
+        if self.lock.locked():
+            self.closing.append(game)
+        elif self.process is not None:
+            self.conn.send(("close", game))
+
+    async def search(self, task, timeout):
+        # Envía una petición y espera la respuesta como mucho timeout segundos; si vence
+        # o se cancela la espera, el proceso se sustituye por otro para que no siga ocupado.
+        # El hilo trabaja con la tubería de este proceso aunque entretanto se reinicie
+        conn, warming, closing = self.conn, self.warming, self.closing
+        self.warming = False
+        self.closing = []
+
+        def exchange():
+            if warming:
+                conn.recv()
+            for game in closing:
+                conn.send(("close", game))
+            conn.send(task)
+            return conn.recv()
+
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(exchange), timeout)
+        except BaseException:
+            self.stop()
+            self.start()
+            self.restarts += 1
+            raise
+
+
+class Game:
+    # Estado de una partida en el servicio: tablero de referencia y jugadas en orden
+    def __init__(self, name, size, player_id, max_time, spec, worker):
+        self.name = name
+        self.size = size
+        self.player_id = player_id
+        self.max_time = max_time
+        self.spec = spec
+        self.worker = worker
+        self.seed = zlib.crc32(name.encode())
+        self.board = HexBoard(size)
+        self.moves = []
+        self.winner = None
+        self.lock = asyncio.Lock()
+
+    def place(self, move, player_id):
+        # Coloca una pieza validándola; devuelve un mensaje de error o None
+        if self.winner is not None:
+            return "la partida ha terminado"
+        r, c = move
+        if not (0 <= r < self.size and 0 <= c < self.size) or self.board.board[r][c]:
+            return f"jugada ilegal {[r, c]}"
+        self.board.place_piece(r, c, player_id)
+        self.moves.append((r, c, player_id))
+        if self.board.check_connection(player_id):
+            self.winner = player_id
+        return None
+
+
+class GameService:
+    def __init__(self, workers: int = None, engine: str = DEFAULT_ENGINE, options: dict = None,
+                 margin: float = 0.05):
+        # Servicio de partidas simultáneas sobre un número fijo de procesos de búsqueda;
+        # cada partida queda fijada a un proceso para conservar su estado entre jugadas.
+        # margin es la parte del límite que se reserva para la comunicación entre procesos
+        count = workers or multiprocessing.cpu_count()
+        self.workers = [SearchWorker(index, engine) for index in range(count)]
+        self.engine = engine
+        self.options = options or {}
+        self.margin = margin
+        self.games = {}
+        self.moves = 0
+        self.timeouts = 0
+
+    def start(self):
+        # Arranca los procesos de búsqueda antes de aceptar partidas
+        for worker in self.workers:
+            worker.start()
+        for worker in self.workers:
+            worker.wait_ready()
+
+    def close(self):
+        # Detiene todos los procesos de búsqueda
+        for worker in self.workers:
+            worker.stop()
+
+    async def handle(self, request: dict) -> dict:
+        # Atiende una petición del protocolo y devuelve la respuesta
+        command = request.get("cmd")
+        handler = getattr(self, f"_cmd_{command}", None)
+        if handler is None:
+            return {"error": f"orden desconocida {command!r}"}
+        try:
+            return await handler(request)
+        except (KeyError, TypeError, ValueError) as error:
+            return {"error": f"petición inválida: {type(error).__name__}: {error}"}
+
+    async def _cmd_new(self, request):
+        # Crea una partida y la asigna al proceso con menos partidas
+        name = str(request["game"])
+        if name in self.games:
+            return {"error": "la partida ya existe"}
+        size = int(request["size"])
+        player_id = int(request.get("player", 1))
+        if size < 1 or player_id not in (1, 2):
+            raise ValueError("tamaño o jugador fuera de rango")
+        options = dict(DEFAULT_OPTIONS, **self.options, **request.get("options", {}))
+        options.update(FORCED_OPTIONS)
+        spec = {"factory": request.get("engine", self.engine), "options": options}
+        worker = min(self.workers, key=lambda w: len(w.games))
+        worker.games.add(name)
+        self.games[name] = Game(name, size, player_id, float(request.get("max_time", 1.0)), spec, worker)
+        return {"ok": True, "worker": worker.index}
+
+    async def _cmd_play(self, request):
+        # Aplica las jugadas del rival y pide al motor la suya antes del límite de la partida
+        deadline = time.monotonic()
+        game = self.games[str(request["game"])]
+        deadline += game.max_time
+        async with game.lock:
+            for move in request.get("moves", []):
+                error = game.place((int(move[0]), int(move[1])), 3 - game.player_id)
+                if error is not None:
+                    return {"error": error}
+            if game.winner is not None:
+                return {"error": "la partida ha terminado", "winner": game.winner}
+            worker = game.worker
+            async with worker.lock:
+                # El tiempo esperando a un proceso libre también cuenta para el límite
+                remaining = deadline - time.monotonic()
+                if remaining <= self.margin:
+                    self.timeouts += 1
+                    return {"error": "timeout", "elapsed": round(game.max_time - remaining, 4)}
+                task = ("play", game.name, game.spec, game.player_id, game.size, game.moves,
+                        remaining - self.margin, game.seed)
+                try:
+                    result = await worker.search(task, remaining)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    return {"error": "timeout", "elapsed": round(game.max_time, 4)}
+                except (EOFError, OSError):
+                    return {"error": "el proceso de búsqueda terminó inesperadamente"}
+            elapsed = round(game.max_time - (deadline - time.monotonic()), 4)
+            if result[0] == "error":
+                return {"error": result[1], "elapsed": elapsed}
+            _, move, depth, nodes, source = result
+            error = game.place(move, game.player_id)
+            if error is not None:
+                return {"error": f"el motor respondió con una {error}", "elapsed": elapsed}
+            self.moves += 1
+            response = {"move": list(move), "elapsed": elapsed, "depth": depth, "nodes": nodes,
+                        "source": source}
+            if game.winner is not None:
+                response["winner"] = game.winner
+            return response
+
+    async def _cmd_close(self, request):
+        # Termina una partida y libera su jugador en el proceso que la tenía
+        game = self.games.pop(str(request["game"]))
+        async with game.lock:
+            game.worker.forget(game.name)
+        return {"ok": True}
+
+    async def _cmd_status(self, request):
+        # Resumen del servicio: partidas, jugadas servidas y carga de cada proceso
+        return {
+            "games": len(self.games),
+            "moves": self.moves,
+            "timeouts": self.timeouts,
+            "workers": [{"games": len(w.games), "busy": w.lock.locked(), "restarts": w.restarts}
+                        for w in self.workers],
+        }
+
+    async def serve(self, lines, send):
+        # Atiende las líneas de una conexión; cada petición corre en su propia tarea y las
+        # respuestas salen según terminan, con la partida y el id de la petición
+        tasks = set()
+        owned = set()
+
+        async def respond(request):
+            response = await self.handle(request)
+            for field in ("id", "game"):
+                if field in request:
+                    response.setdefault(field, request[field])
+            if request.get("cmd") == "new" and response.get("ok"):
+                owned.add(str(request["game"]))
+            await send(response)
+
+        try:
+            async for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("se esperaba un objeto")
+                except ValueError as error:
+                    await send({"error": f"JSON inválido: {error}"})
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            # Fin de la entrada: se terminan las peticiones pendientes
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Las partidas de una conexión cerrada se liberan
+            for name in owned:
+                game = self.games.pop(name, None)
+                if game is not None:
+                    game.worker.forget(name)
+
+
+def _encode(response):
+    # Respuesta como línea JSON compacta
+    return (json.dumps(response, separators=(",", ":")) + "\n").encode()
+
+
+async def _serve_stdio(service):
+    # Protocolo por la entrada y salida estándar
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    async def lines():
+        while line := await reader.readline():
+            yield line.decode()
+
+    async def send(response):
+        sys.stdout.buffer.write(_encode(response))
+        sys.stdout.buffer.flush()
+
+    await service.serve(lines(), send)
+
+
+async def _serve_socket(service, host, port):
+    # Protocolo por un socket TCP local; cada conexión es independiente
+    async def client(reader, writer):
+        async def lines():
+            while line := await reader.readline():
+                yield line.decode()
+
+        async def send(response):
+            writer.write(_encode(response))
+            await writer.drain()
+
+        try:
+            await service.serve(lines(), send)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(client, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    # Línea de órdenes: servicio de partidas por stdin/stdout o por un puerto local
+    parser = argparse.ArgumentParser(description="Servicio de partidas simultáneas de Hex")
+    parser.add_argument("--workers", type=int, help="procesos de búsqueda (por defecto, uno por núcleo)")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, help="módulo:Clase del motor")
+    parser.add_argument("--options", help="opciones JSON del motor (argumentos o atributos)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="escucha en este puerto en lugar de stdin/stdout")
+    args = parser.parse_args(argv)
+
+    service = GameService(args.workers, args.engine, json.loads(args.options) if args.options else None)
+    service.start()
+    try:
+        if args.port is None:
+            asyncio.run(_serve_stdio(service))
+        else:
+            asyncio.run(_serve_socket(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
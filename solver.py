@@ -0,0 +1,276 @@
+import os
+import time
+import struct
+
+from geometry import GOAL_EDGES, edge_flags, neighbor_table
+from player import SIDE_KEY, SearchTimeout, zobrist_table
+from inferior import InferiorCells
+from patterns import PatternEngine
+
+# Número de prueba o refutación infinito: la posición ya está resuelta
+INFINITY = 1 << 30
+
+# Margen del truco 1+epsilon: el hijo se sigue expandiendo hasta superar en este
+# factor al segundo mejor, lo que evita saltar de rama en rama
+EPSILON = 0.25
+
+
+def winning_cells(board, player_id):
+    # Casillas vacías que ganan en el acto: unen grupos propios que tocan los dos bordes
+    size = board.size
+    flags = edge_flags(size)
+    neighbors = neighbor_table(size)
+    goal = GOAL_EDGES[player_id]
+    cells = board._cells
+    edges = board._edges
+    wins = []
+    for idx in board._empty:
+        reached = flags[idx]
+        for nb in neighbors[idx]:
+            if cells[nb] == player_id:
+                reached |= edges[board._find(nb)]
+        if reached & goal == goal:
+            wins.append(idx)
+    return wins
+
+
+def virtual_win(board, player_id):
+    # Conexión virtual ganadora: grupos unidos entre sí y a los bordes por puentes y
+    # plantillas de borde cuyos portadores vacíos no comparte ningún otro enlace, de modo
+    # que cada invasión tiene respuesta. Devuelve una casilla que la mantiene, o None
+    engine = PatternEngine.for_size(board.size)
+    empty = ~(board.stones[1] | board.stones[2])
+    links = [(a, b, carrier & empty) for a, b, carrier in engine.bridge_links(board, player_id)]
+    # Los bordes se representan con índices negativos para no chocar con las casillas
+    links += [(idx, -edge, carrier & empty) for idx, edge, carrier in engine.edge_links(board, player_id)]
+    if not links:
+        return None
+
+    seen = 0
+    shared = 0
+    for _, _, carrier in links:
+        shared |= seen & carrier
+        seen |= carrier
+
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            x = parent[x]
+        return x
+
+    for edge in (1, 2, 4, 8):
+        parent[-edge] = -edge
+    goal = GOAL_EDGES[player_id]
+    used = []
+    for a, b, carrier in links:
+        if carrier & shared or not carrier:
+            continue
+        ra = find(board.root(a))
+        rb = find(b if b < 0 else board.root(b))
+        if ra != rb:
+            parent[ra] = rb
+            used.append(carrier)
+    # Cada grupo se une también a los bordes que ya toca
+    for root in {board.root(idx) for idx, _, _ in links} | {board.root(b) for _, b, _ in links if b >= 0}:
+        flags = board.edges_of(root)
+        for edge in (1, 2, 4, 8):
+            if flags & edge & goal:
+                ra, rb = find(root), find(-edge)
+                if ra != rb:
+                    parent[ra] = rb
+    low, high = [-edge for edge in (1, 2, 4, 8) if edge & goal]
+    if find(low) != find(high) or not used:
+        return None
+    carrier = used[0]
+    return (carrier & -carrier).bit_length() - 1
+
+
+def position_key(board, player_id):
+    # Hash de la posición con el jugador que mueve incluido
+    return board.hash ^ SIDE_KEY if player_id == 1 else board.hash
+
+
+class ProofTable:
+    def __init__(self, max_entries: int = 1 << 18):
+        # Tabla acotada de (phi, delta, jugada ganadora) por posición
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        # Devuelve (phi, delta, jugada) o None
+        return self.entries.get(key)
+
+    def put(self, key, phi, delta, move=None):
+        # Guarda una entrada; al llenarse descarta primero las posiciones sin resolver
+        entries = self.entries
+        if len(entries) >= self.max_entries and key not in entries:
+            for old in [k for k, (p, d, _) in entries.items() if p and d]:
+                del entries[old]
+            if len(entries) >= self.max_entries * 3 // 4:
+                entries.clear()
+        entries[key] = (phi, delta, move)
+
+
+class SolverCache:
+    # Entrada en disco: clave de la posición, tamaño, gana quien mueve y casilla ganadora
+    ENTRY = struct.Struct("<QHBH")
+
+    def __init__(self, path):
+        # Carga las posiciones resueltas en partidas anteriores
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                data = handle.read()
+            usable = len(data) - len(data) % self.ENTRY.size
+            for key, size, wins, move in self.ENTRY.iter_unpack(data[:usable]):
+                self.results[(key, size)] = (bool(wins), move)
+
+    def get(self, key, size):
+        # Devuelve (gana quien mueve, casilla ganadora) o None
+        return self.results.get((key, size))
+
+    def put(self, key, size, wins, move):
+        # Añade una posición resuelta al final del fichero
+        if (key, size) in self.results:
+            return
+        self.results[(key, size)] = (wins, move)
+        with open(self.path, "ab") as handle:
+            handle.write(self.ENTRY.pack(key, size, int(wins), move if move is not None else 0xFFFF))
+
+
+class DFPNSolver:
+    def __init__(self, max_entries: int = 1 << 18, cache_path: str = None):
+        # Búsqueda por números de prueba en profundidad con tabla propia y caché opcional
+        self.table = ProofTable(max_entries)
+        self.cache = SolverCache(cache_path) if cache_path else None
+        self.size = None
+        self._children = {}
+        self.nodes = 0
+        self.deadline = None
+        self.max_nodes = None
+
+    def solve(self, board, player_id, deadline=None, max_nodes=None):
+        # Resuelve la posición para el jugador que mueve; devuelve (ganador, jugada ganadora
+        # o None) o None si se agota el tiempo o el límite de nodos. Juega sobre el tablero
+        # recibido y lo deja como estaba
+        if self.size != board.size:
+            self.size = board.size
+            self.table = ProofTable(self.table.max_entries)
+            self._children = {}
+        opponent = 3 - player_id
+        if board.check_connection(player_id):
+            return player_id, None
+        if board.check_connection(opponent):
+            return opponent, None
+
+        key = position_key(board, player_id)
+        if self.cache is not None:
+            cached = self.cache.get(key, board.size)
+            if cached is not None:
+                wins, move = cached
+                if not wins:
+                    return opponent, None
+                move = divmod(move, board.size)
+                if board.board[move[0]][move[1]] == 0:
+                    return player_id, move
+
+        self.nodes = 0
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        marks = len(board._moves)
+        try:
+            self._mid(board, player_id, key, INFINITY, INFINITY)
+        except SearchTimeout:
+            while len(board._moves) > marks:
+                board.undo()
+            return None
+
+        phi, delta, move = self.table.get(key)
+        wins = phi == 0
+        if self.cache is not None:
+            self.cache.put(key, board.size, wins, move)
+        if wins:
+            return player_id, divmod(move, board.size)
+        return opponent, None
+
+    def _moves(self, board, player_id, key):
+        # Jugadas no inferiores con la clave del hijo y si ganan en el acto; se memorizan
+        children = self._children.get(key)
+        if children is not None:
+            return children
+        size = board.size
+        zobrist = zobrist_table(size)[player_id]
+        wins = winning_cells(board, player_id)
+        if not wins:
+            keeper = virtual_win(board, player_id)
+            if keeper is not None:
+                wins = [keeper]
+        if wins:
+            # Con una jugada ganadora no hace falta mirar las demás
+            children = [(wins[0], 0, True)]
+        elif virtual_win(board, 3 - player_id) is not None:
+            # El rival ya tiene una conexión virtual: la posición está perdida
+            children = []
+        else:
+            threats = winning_cells(board, 3 - player_id)
+            if threats:
+                # El rival gana en una jugada: solo sirve tapar; con dos amenazas
+                # distintas cualquier casilla sirve para la prueba, basta una
+                moves = threats[:1] if len(threats) == 1 else [min(threats)]
+            else:
+                moves = InferiorCells.for_size(size).prune(board, sorted(board._empty), player_id)
+            # El hijo lo mueve el rival: se cambia el lado de la clave
+            children = [(idx, key ^ zobrist[idx] ^ SIDE_KEY, False) for idx in moves]
+        if len(self._children) >= self.table.max_entries:
+            self._children.clear()
+        self._children[key] = children
+        return children
+
+    def _mid(self, board, player_id, key, phi_limit, delta_limit):
+        # Expande la posición hasta superar alguno de los dos umbrales
+        self.nodes += 1
+        # Cada nodo cuesta milisegundos: el reloj se consulta en todos
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout()
+
+        children = self._moves(board, player_id, key)
+        table = self.table
+        size = board.size
+        while True:
+            # phi: mínimo delta de los hijos; delta: suma de sus phi
+            phi = INFINITY
+            delta = 0
+            best = None
+            best_phi = 0
+            second = INFINITY
+            for idx, child_key, won in children:
+                if won:
+                    child_phi, child_delta = INFINITY, 0
+                else:
+                    entry = table.get(child_key)
+                    child_phi, child_delta = (entry[0], entry[1]) if entry else (1, 1)
+                delta = min(INFINITY, delta + child_phi)
+                if child_delta < phi:
+                    second = phi
+                    phi = child_delta
+                    best = (idx, child_key)
+                    best_phi = child_phi
+                elif child_delta < second:
+                    second = child_delta
+            if phi >= phi_limit or delta >= delta_limit:
+                break
+            idx, child_key = best
+            child_phi_limit = min(INFINITY, delta_limit - delta + best_phi)
+            child_delta_limit = min(phi_limit, int(second * (1 + EPSILON)) + 1)
+            board.place_piece(idx // size, idx % size, player_id)
+            self._mid(board, 3 - player_id, child_key, child_phi_limit, child_delta_limit)
+            board.undo()
+
+        table.put(key, phi, delta, best[0] if phi == 0 else None)
@@ -0,0 +1,192 @@
+import random
+
+import pytest
+
+from player import HexBoard, TOP, BOTTOM, LEFT, RIGHT
+
+# Desplazamientos de las seis vecinas, para las comprobaciones de referencia
+_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1))
+
+
+def _random_moves(rng, size, count):
+    # Jugadas alternas de los dos jugadores sobre casillas distintas elegidas al azar
+    cells = rng.sample(range(size * size), count)
+    return [(idx // size, idx % size, 1 + i % 2) for i, idx in enumerate(cells)]
+
+
+def _reference_connection(matrix, player_id):
+    # Recorrido en anchura sobre la matriz: el 1 une izquierda y derecha, el 2 arriba y abajo
+    size = len(matrix)
+    if player_id == 1:
+        frontier = [(r, 0) for r in range(size) if matrix[r][0] == 1]
+        reached = lambda r, c: c == size - 1
+    else:
+        frontier = [(0, c) for c in range(size) if matrix[0][c] == 2]
+        reached = lambda r, c: r == size - 1
+    seen = set(frontier)
+    while frontier:
+        r, c = frontier.pop()
+        if reached(r, c):
+            return True
+        for dr, dc in _DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if (0 <= nr < size and 0 <= nc < size and (nr, nc) not in seen
+                    and matrix[nr][nc] == player_id):
+                seen.add((nr, nc))
+                frontier.append((nr, nc))
+    return False
+
+
+def test_place_piece_rejects_occupied_and_outside_cells():
+    # Una casilla ocupada, fuera del tablero o un jugador inválido no cambian nada
+    board = HexBoard(3)
+    assert board.place_piece(1, 1, 1)
+    assert not board.place_piece(1, 1, 2)
+    assert not board.place_piece(3, 0, 1)
+    assert not board.place_piece(0, 0, 3)
+    assert board.board[1][1] == 1
+    assert len(board.get_possible_moves()) == 8
+
+
+def test_board_rows_are_read_only():
+    # La vista board[r][c] no permite escribir por detrás de los grupos
+    board = HexBoard(3)
+    with pytest.raises(TypeError):
+        board.board[0][0] = 1
+
+
+def test_clone_copies_on_write():
+    # Las jugadas en la copia no se ven en el original ni al revés
+    board = HexBoard(4)
+    board.place_piece(0, 0, 1)
+    copy = board.clone()
+    copy.place_piece(1, 1, 2)
+    board.place_piece(2, 2, 1)
+    assert board.board[1][1] == 0 and copy.board[1][1] == 2
+    assert copy.board[2][2] == 0 and board.board[2][2] == 1
+    assert copy.board[0][0] == 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_check_connection_matches_reference(seed):
+    # Tras cada jugada la conexión coincide con un recorrido de la matriz
+    rng = random.Random(seed)
+    size = rng.choice([3, 4, 5, 7])
+    board = HexBoard(size)
+    for r, c, player_id in _random_moves(rng, size, size * size):
+        board.place_piece(r, c, player_id)
+        matrix = [list(row) for row in board.board]
+        for player in (1, 2):
+            assert board.check_connection(player) == _reference_connection(matrix, player)
+    assert board.get_possible_moves() == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_undo_restores_the_previous_position(seed):
+    # Deshacer cada jugada, también las ganadoras, devuelve casillas, vacías y conexiones
+    rng = random.Random(seed)
+    size = rng.choice([3, 4, 5, 7])
+    board = HexBoard(size)
+    snapshots = []
+    for r, c, player_id in _random_moves(rng, size, size * size):
+        snapshots.append(([tuple(row) for row in board.board], sorted(board.get_possible_moves()),
+                          board.check_connection(1), board.check_connection(2)))
+        board.place_piece(r, c, player_id)
+    while snapshots:
+        assert board.undo() is not None
+        matrix, empty, first, second = snapshots.pop()
+        assert [tuple(row) for row in board.board] == matrix
+        assert sorted(board.get_possible_moves()) == empty
+        assert (board.check_connection(1), board.check_connection(2)) == (first, second)
+
+
+def test_undo_on_a_clone_leaves_the_original_alone():
+    # Deshacer en la copia no toca las piezas compartidas con el original
+    board = HexBoard(4)
+    board.place_piece(0, 0, 1)
+    copy = board.clone()
+    copy.place_piece(0, 1, 1)
+    copy.undo()
+    assert copy.board[0][1] == 0
+    assert board.board[0][0] == 1
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_hash_depends_only_on_the_position(seed):
+    # El hash no depende del orden de las jugadas y deshacer lo devuelve a su valor
+    rng = random.Random(seed)
+    size = rng.choice([3, 4, 5, 7])
+    moves = _random_moves(rng, size, size * size // 2)
+    board = HexBoard(size)
+    hashes = []
+    for r, c, player_id in moves:
+        hashes.append(board.hash)
+        board.place_piece(r, c, player_id)
+    shuffled = HexBoard(size)
+    for r, c, player_id in rng.sample(moves, len(moves)):
+        shuffled.place_piece(r, c, player_id)
+    assert shuffled.hash == board.hash
+    assert HexBoard.from_matrix([list(row) for row in board.board]).hash == board.hash
+    while hashes:
+        board.undo()
+        assert board.hash == hashes.pop()
+    assert board.hash == 0
+
+
+def test_hash_distinguishes_the_owner_of_a_cell():
+    # La misma casilla con piezas de distinto color da hashes distintos
+    first = HexBoard(4)
+    first.place_piece(1, 2, 1)
+    second = HexBoard(4)
+    second.place_piece(1, 2, 2)
+    assert first.hash != second.hash
+
+
+def _reference_groups(matrix, player_id):
+    # Grupos por recorrido de la matriz: (casillas, bordes, máscara de libertades)
+    size = len(matrix)
+    seen = set()
+    groups = set()
+    for r in range(size):
+        for c in range(size):
+            if matrix[r][c] != player_id or (r, c) in seen:
+                continue
+            cells, edges, liberties = [], 0, 0
+            frontier = [(r, c)]
+            seen.add((r, c))
+            while frontier:
+                cr, cc = frontier.pop()
+                cells.append((cr, cc))
+                edges |= ((TOP if cr == 0 else 0) | (BOTTOM if cr == size - 1 else 0)
+                          | (LEFT if cc == 0 else 0) | (RIGHT if cc == size - 1 else 0))
+                for dr, dc in _DIRECTIONS:
+                    nr, nc = cr + dr, cc + dc
+                    if not (0 <= nr < size and 0 <= nc < size):
+                        continue
+                    if matrix[nr][nc] == 0:
+                        liberties |= 1 << (nr * size + nc)
+                    elif matrix[nr][nc] == player_id and (nr, nc) not in seen:
+                        seen.add((nr, nc))
+                        frontier.append((nr, nc))
+            groups.add((frozenset(cells), edges, liberties))
+    return groups
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_groups_match_reference(seed):
+    # Grupos, bordes y libertades coinciden con un recorrido tras jugar y tras deshacer
+    rng = random.Random(seed)
+    size = rng.choice([3, 4, 5, 7, 9])
+    board = HexBoard(size)
+    for r, c, player_id in _random_moves(rng, size, size * size * 2 // 3):
+        board.place_piece(r, c, player_id)
+        if rng.random() < 0.3:
+            board.undo()
+        matrix = [list(row) for row in board.board]
+        for player in (1, 2):
+            groups = {(frozenset(group), group.edges, group.liberties)
+                      for group in board.groups(player)}
+            assert groups == _reference_groups(matrix, player)
+            for group in board.groups(player):
+                for gr, gc in group:
+                    assert board.group_edges(gr, gc) == group.edges
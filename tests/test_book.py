@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from book import OpeningBook, canonical_key, write_book, read_book
+
+
+def _images(size, stones, player_id, move):
+    # Las cuatro posiciones simétricas con su jugador al turno y la imagen de la jugada
+    last = size - 1
+    transforms = (
+        (lambda r, c: (r, c), False),
+        (lambda r, c: (last - r, last - c), False),
+        (lambda r, c: (c, r), True),
+        (lambda r, c: (last - c, last - r), True),
+    )
+    for transform, swap in transforms:
+        image = [0, 0, 0]
+        for owner in (1, 2):
+            colour = 3 - owner if swap else owner
+            for idx in range(size * size):
+                if stones[owner] >> idx & 1:
+                    r, c = transform(*divmod(idx, size))
+                    image[colour] |= 1 << (r * size + c)
+        yield image, 3 - player_id if swap else player_id, transform(*move)
+
+
+def _random_position(rng, size, count):
+    # Piezas alternas al azar y una casilla vacía como jugada del libro
+    cells = rng.sample(range(size * size), count + 1)
+    stones = [0, 0, 0]
+    for i, idx in enumerate(cells[:-1]):
+        stones[1 + i % 2] |= 1 << idx
+    return stones, 1 + count % 2, divmod(cells[-1], size)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_symmetric_positions_share_the_canonical_key(seed):
+    # Las cuatro simetrías (con cambio de color al trasponer) dan la misma clave
+    rng = random.Random(seed)
+    size = rng.choice([3, 5, 7, 11])
+    stones, player_id, move = _random_position(rng, size, rng.randrange(size))
+    keys = {canonical_key(size, image, mover)[0]
+            for image, mover, _ in _images(size, stones, player_id, move)}
+    assert len(keys) == 1
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_book_round_trip_through_every_symmetry(seed, tmp_path):
+    # Una entrada escrita desde una orientación se lee en todas con la jugada transformada
+    rng = random.Random(seed)
+    size = rng.choice([3, 5, 7, 11])
+    # Una posición simétrica admite varias jugadas equivalentes: se buscan asimétricas
+    while True:
+        stones, player_id, move = _random_position(rng, size, rng.randrange(1, size + 1))
+        images = list(_images(size, stones, player_id, move))
+        if len({(tuple(image), mover) for image, mover, _ in images}) == 4:
+            break
+    key, index = canonical_key(size, stones, player_id)
+    # La entrada se guarda en el sistema canónico, como hace build_book
+    canonical_move = images[index][2]
+    path = str(tmp_path / "book.bin")
+    write_book(path, {(key, size): (canonical_move[0] * size + canonical_move[1], 42)})
+    assert read_book(path) == {(key, size): (canonical_move[0] * size + canonical_move[1], 42)}
+
+    book = OpeningBook(path)
+    try:
+        assert len(book) == 1
+        for image, mover, expected in images:
+            assert book.probe(size, image, mover) == (expected, 42)
+        assert book.probe(size, stones, 3 - player_id) is None
+    finally:
+        book.close()
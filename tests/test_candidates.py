@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from player import HexBoard, CandidateGenerator
+
+
+def test_changed_stones_covers_merged_groups():
+    # Una pieza aislada solo se cambia a sí misma; la que une dos grupos cambia a todos
+    board = HexBoard(5)
+    board.place_piece(2, 0, 1)
+    assert board.changed_stones() == 1 << 10
+    board.place_piece(2, 2, 1)
+    assert board.changed_stones() == 1 << 12
+    board.place_piece(2, 1, 1)
+    assert board.changed_stones() == (1 << 10) | (1 << 11) | (1 << 12)
+    board.undo()
+    board.place_piece(3, 2, 1)
+    assert board.changed_stones() == 1 << 17
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_derived_candidates_match_a_fresh_generator(seed):
+    # Las candidatas derivadas de la posición padre coinciden con un cálculo completo a
+    # lo largo de un recorrido al azar de jugadas y deshacer
+    rng = random.Random(seed)
+    size = rng.choice([5, 7, 9, 11])
+    player_id = rng.choice([1, 2])
+    board = HexBoard(size)
+    generator = CandidateGenerator(max_candidates=None)
+    generator.new_search(size)
+    generator.set_root(board, player_id)
+    for _ in range(size * size):
+        if board._moves and rng.random() < 0.35:
+            board.undo()
+        else:
+            idx = rng.choice(sorted(board._empty))
+            board.place_piece(idx // size, idx % size, 1 + len(board._moves) % 2)
+        mover = rng.choice([1, 2])
+        fresh = CandidateGenerator(max_candidates=None)
+        fresh.new_search(size)
+        assert generator.generate(board, player_id, None, mover) == fresh.generate(board, player_id, None, mover)
+    assert generator.derived
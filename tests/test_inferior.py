@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from player import HexBoard
+from inferior import InferiorCells
+
+
+def _board(size, stones):
+    # Tablero con las piezas dadas como {(fila, columna): jugador}
+    board = HexBoard(size)
+    for (r, c), player_id in stones.items():
+        board.place_piece(r, c, player_id)
+    return board
+
+
+def _winner(board, to_move, memo):
+    # Ganador con juego perfecto por búsqueda exhaustiva; en Hex siempre hay uno
+    key = (board.stones[1], board.stones[2], to_move)
+    result = memo.get(key)
+    if result is None:
+        result = 3 - to_move
+        if not board.check_connection(result):
+            for idx in sorted(board._empty):
+                board.place_piece(idx // board.size, idx % board.size, to_move)
+                wins = _winner(board, 3 - to_move, memo) == to_move
+                board.undo()
+                if wins:
+                    result = to_move
+                    break
+        memo[key] = result
+    return result
+
+
+def _random_positions(count, size=4, stones=(5, 8)):
+    # Posiciones al azar sin conexión, con el jugador al turno según las piezas puestas
+    rng = random.Random(size)
+    positions = []
+    while len(positions) < count:
+        placed = rng.randint(*stones)
+        board = HexBoard(size)
+        for i, idx in enumerate(rng.sample(range(size * size), placed)):
+            board.place_piece(idx // size, idx % size, 1 + i % 2)
+        if not board.check_connection(1) and not board.check_connection(2):
+            positions.append((board, 1 + placed % 2))
+    return positions
+
+
+_POSITIONS = _random_positions(12)
+
+
+def test_four_neighbours_in_a_row_make_a_cell_dead():
+    # Cuatro vecinas seguidas de un color, o tres y dos del otro, matan la casilla
+    analysis = InferiorCells.for_size(5)
+    board = _board(5, {(1, 2): 1, (1, 3): 1, (2, 3): 1, (3, 2): 1})
+    assert analysis.is_dead(board._cells, 2 * 5 + 2)
+    board = _board(5, {(1, 2): 1, (1, 3): 1, (2, 3): 1, (3, 2): 2, (3, 1): 2})
+    assert analysis.is_dead(board._cells, 2 * 5 + 2)
+    board = _board(5, {(1, 2): 1, (1, 3): 2, (2, 3): 1, (3, 2): 2})
+    assert not analysis.is_dead(board._cells, 2 * 5 + 2)
+
+
+def test_edges_count_as_their_owners_stones():
+    # En la fila superior el borde es del jugador 2: con sus dos vecinas de fila suyas
+    # hay cuatro seguidas y la casilla está muerta
+    analysis = InferiorCells.for_size(5)
+    board = _board(5, {(0, 1): 2, (0, 3): 2})
+    assert analysis.is_dead(board._cells, 2)
+    board = _board(5, {(0, 1): 1, (0, 3): 1})
+    assert not analysis.is_dead(board._cells, 2)
+
+
+@pytest.mark.parametrize("position", range(len(_POSITIONS)))
+def test_dead_and_captured_cells_do_not_change_the_winner(position):
+    # Rellenar una casilla muerta con cualquier color, o una pareja capturada con el
+    # color de quien la captura, no cambia el ganador de la posición
+    board, to_move = _POSITIONS[position]
+    size = board.size
+    analysis = InferiorCells.for_size(size)
+    memo = {}
+    winner = _winner(board, to_move, memo)
+    for idx in sorted(board._empty):
+        cells = board._cells
+        fills = []
+        if analysis.is_dead(cells, idx):
+            fills = [[(idx, 1)], [(idx, 2)]]
+        for player_id in (1, 2):
+            partner = analysis.captured_partner(cells, idx, player_id)
+            if partner is not None:
+                fills.append([(idx, player_id), (partner, player_id)])
+        for fill in fills:
+            for cell, player_id in fill:
+                board.place_piece(cell // size, cell % size, player_id)
+            assert _winner(board, to_move, memo) == winner
+            for _ in fill:
+                board.undo()
+
+
+@pytest.mark.parametrize("position", range(len(_POSITIONS)))
+def test_pruning_keeps_a_winning_move(position):
+    # Si el jugador al turno gana, entre las jugadas que quedan tras podar hay una ganadora
+    board, to_move = _POSITIONS[position]
+    size = board.size
+    analysis = InferiorCells.for_size(size)
+    memo = {}
+    moves = sorted(board._empty)
+    kept = analysis.prune(board, moves, to_move)
+    assert kept and set(kept) <= set(moves)
+    if _winner(board, to_move, memo) != to_move:
+        return
+    winning = []
+    for idx in kept:
+        board.place_piece(idx // size, idx % size, to_move)
+        winning.append(_winner(board, 3 - to_move, memo) == to_move)
+        board.undo()
+    assert any(winning)
+
+
+@pytest.mark.parametrize("position", range(len(_POSITIONS)))
+def test_fill_in_preserves_the_winner(position):
+    # El relleno de la raíz, cuando no decide la partida, mantiene el ganador
+    board, to_move = _POSITIONS[position]
+    analysis = InferiorCells.for_size(board.size)
+    winner = _winner(board, to_move, {})
+    marks = len(board._moves)
+    placed = analysis.fill_in(board)
+    try:
+        if analysis.fill_is_safe(board):
+            assert _winner(board, to_move, {}) == winner
+    finally:
+        for _ in placed:
+            board.undo()
+    assert len(board._moves) == marks
@@ -0,0 +1,54 @@
+import io
+import random
+
+import pytest
+
+from player import HexBoard
+from position import encode, decode, to_string, from_string, read_records, record_length
+
+
+def _random_board(rng):
+    # Tablero al azar de tamaño variable, también con tamaños que no llenan el último byte
+    size = rng.choice([1, 2, 3, 5, 7, 11, 19])
+    board = HexBoard(size)
+    for i, idx in enumerate(rng.sample(range(size * size), rng.randrange(size * size + 1))):
+        board.place_piece(idx // size, idx % size, 1 + i % 2)
+    return board
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_encode_decode_round_trip(seed):
+    # Decodificar el registro devuelve las mismas piezas, hash y jugador al turno
+    rng = random.Random(seed)
+    board = _random_board(rng)
+    to_move = rng.choice([1, 2])
+    data = encode(board, to_move)
+    assert len(data) == record_length(board.size)
+    decoded, decoded_to_move = decode(data)
+    assert decoded_to_move == to_move
+    assert decoded.stones == board.stones
+    assert decoded.hash == board.hash
+    assert from_string(to_string(board, to_move))[0].stones == board.stones
+
+
+def test_side_to_move_defaults_to_the_stone_count():
+    # Sin jugador explícito le toca al 1 con las piezas igualadas y al 2 si no
+    board = HexBoard(3)
+    assert decode(encode(board))[1] == 1
+    board.place_piece(1, 1, 1)
+    assert decode(encode(board))[1] == 2
+
+
+def test_read_records_splits_concatenated_records():
+    # Registros de tamaños distintos seguidos se leen uno a uno
+    rng = random.Random(1)
+    records = [encode(_random_board(rng), 1) for _ in range(5)]
+    assert list(read_records(io.BytesIO(b"".join(records)))) == records
+
+
+@pytest.mark.parametrize("data", [b"", b"\x03", b"\x03\x03\x00\x00\x00", b"\x02\x01\x00\x00",
+                                  b"\x01\x01\x03"])
+def test_decode_rejects_invalid_records(data):
+    # Registros truncados, con jugador inválido, de longitud errónea o casilla 3
+    with pytest.raises(ValueError):
+        decode(data)
@@ -0,0 +1,38 @@
+import threading
+import multiprocessing
+
+from service import DEFAULT_OPTIONS, FORCED_OPTIONS, _worker_main
+from tournament import DEFAULT_ENGINE
+
+
+def _play(conn, moves):
+    # Pide al proceso de búsqueda la jugada del jugador 2 tras las jugadas dadas
+    spec = {"factory": DEFAULT_ENGINE, "options": dict(DEFAULT_OPTIONS, **FORCED_OPTIONS)}
+    conn.send(("play", "g", spec, 2, 5, list(moves), 0.3, 0))
+    return conn.recv()
+
+
+def test_moves_without_search_report_no_depth():
+    # Una jugada de simetría tras una búsqueda no arrastra la profundidad ni los nodos
+    conn, child = multiprocessing.Pipe()
+    worker = threading.Thread(target=_worker_main, args=(child, DEFAULT_ENGINE), daemon=True)
+    worker.start()
+    try:
+        assert conn.recv() == ("ready",)
+        moves = [(1, 1, 1)]
+        kind, move, depth, nodes, source = _play(conn, moves)
+        assert (kind, source, depth, nodes) == ("move", "symmetry", None, None)
+
+        # Una jugada en la diagonal no tiene simétrica libre: se busca
+        moves += [(move[0], move[1], 2), (3, 3, 1)]
+        kind, move, depth, nodes, source = _play(conn, moves)
+        assert source == "search"
+        assert depth and nodes
+
+        moves += [(move[0], move[1], 2), (0, 3, 1)]
+        kind, move, depth, nodes, source = _play(conn, moves)
+        assert move == (3, 0)
+        assert (source, depth, nodes) == ("symmetry", None, None)
+    finally:
+        conn.close()
+        worker.join(5)
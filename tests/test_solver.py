@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from player import HexBoard
+from solver import DFPNSolver
+
+
+def _winner(board, to_move, memo):
+    # Ganador con juego perfecto por búsqueda exhaustiva; en Hex siempre hay uno
+    key = (board.stones[1], board.stones[2], to_move)
+    result = memo.get(key)
+    if result is None:
+        result = 3 - to_move
+        if not board.check_connection(result):
+            for idx in sorted(board._empty):
+                board.place_piece(idx // board.size, idx % board.size, to_move)
+                wins = _winner(board, 3 - to_move, memo) == to_move
+                board.undo()
+                if wins:
+                    result = to_move
+                    break
+        memo[key] = result
+    return result
+
+
+def _random_position(rng, size, placed):
+    # Piezas alternas al azar, sin que ninguno de los dos haya conectado todavía
+    while True:
+        board = HexBoard(size)
+        for i, idx in enumerate(rng.sample(range(size * size), placed)):
+            board.place_piece(idx // size, idx % size, 1 + i % 2)
+        if not board.check_connection(1) and not board.check_connection(2):
+            return board, 1 + placed % 2
+
+
+@pytest.mark.parametrize("size, placed, seed", [(3, placed, seed) for placed in range(4) for seed in range(3)]
+                         + [(4, placed, seed) for placed in (5, 6, 7, 8) for seed in range(4)])
+def test_solver_agrees_with_exhaustive_search(size, placed, seed):
+    # El ganador coincide con la búsqueda exhaustiva y la jugada dada gana de verdad
+    rng = random.Random(seed * 100 + placed)
+    board, to_move = _random_position(rng, size, placed)
+    memo = {}
+    expected = _winner(board, to_move, memo)
+    stones = list(board.stones)
+    winner, move = DFPNSolver().solve(board, to_move)
+    assert board.stones == stones
+    assert winner == expected
+    if winner == to_move:
+        r, c = move
+        assert board.board[r][c] == 0
+        board.place_piece(r, c, to_move)
+        assert _winner(board, 3 - to_move, memo) == to_move
+    else:
+        assert move is None
+
+
+def test_solver_gives_up_at_the_node_limit():
+    # Sin nodos suficientes no hay resultado y el tablero queda como estaba
+    board = HexBoard(9)
+    board.place_piece(0, 0, 1)
+    stones = list(board.stones)
+    assert DFPNSolver().solve(board, 2, max_nodes=5) is None
+    assert board.stones == stones
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from player import HexBoard, HexPlayer, TranspositionTable, SIDE_KEY, EXACT, LOWER, UPPER
+
+
+def _searcher(size, depth):
+    # Jugador listo para llamar a minimax fuera de play(), sin agotar el tiempo
+    player = HexPlayer(1, max_time=1000)
+    player.time_manager.begin_move(size * size)
+    player.orderer.new_search(size)
+    player.candidates.new_search(size)
+    player.root_depth = depth
+    return player
+
+
+def test_probe_returns_the_stored_entry():
+    # Una entrada se recupera con su clave y no con otra que caiga en la misma ranura
+    table = TranspositionTable(1)
+    key = 12345
+    table.store(key, 3, 17, LOWER, (1, 2))
+    assert table.probe(key)[:4] == (3, 17, LOWER, (1, 2))
+    assert table.probe(key + table.mask + 1) is None
+
+
+def test_deeper_entries_of_the_current_search_are_kept():
+    # Otra posición menos profunda no desplaza a una entrada de esta búsqueda
+    table = TranspositionTable(1)
+    key, other = 7, 7 + table.mask + 1
+    table.store(key, 5, 10, EXACT, (0, 0))
+    table.store(other, 2, 20, EXACT, (1, 1))
+    assert table.probe(key)[1] == 10
+    assert table.probe(other) is None
+
+
+def test_same_position_and_older_searches_are_replaced():
+    # La misma posición siempre se actualiza y las entradas viejas ceden su ranura
+    table = TranspositionTable(1)
+    key, other = 7, 7 + table.mask + 1
+    table.store(key, 5, 10, EXACT, (0, 0))
+    table.store(key, 1, 11, UPPER, (0, 1))
+    assert table.probe(key)[:3] == (1, 11, UPPER)
+    table.store(key, 5, 10, EXACT, (0, 0))
+    table.new_search()
+    table.store(other, 2, 20, EXACT, (1, 1))
+    assert table.probe(key) is None
+    assert table.probe(other)[1] == 20
+    table.clear()
+    assert table.probe(other) is None
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_search_bounds_are_consistent_with_the_exact_value(seed):
+    # Con ventanas nulas junto al valor exacto la raíz guarda cotas que lo contienen y
+    # una búsqueda completa sobre esas cotas da el mismo valor
+    rng = random.Random(seed)
+    size, depth = 4, 3
+    board = HexBoard(size)
+    for i, idx in enumerate(rng.sample(range(size * size), 4)):
+        board.place_piece(idx // size, idx % size, 1 + i % 2)
+    exact = _searcher(size, depth).minimax(board, depth, float('-inf'), float('inf'), True)
+
+    player = _searcher(size, depth)
+    key = board.hash ^ SIDE_KEY
+    assert player.minimax(board, depth, exact, exact + 1, True) == exact
+    depth_stored, value, flag = player.tt.probe(key)[:3]
+    assert (depth_stored, value, flag) == (depth, exact, UPPER)
+    assert player.minimax(board, depth, exact - 1, exact, True) == exact
+    assert player.tt.probe(key)[1:3] == (exact, LOWER)
+    assert player.minimax(board, depth, float('-inf'), float('inf'), True) == exact
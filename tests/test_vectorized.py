@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from player import HexBoard, HexPlayer
+from vectorized import BatchEvaluator
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_matches_evaluate_position(seed):
+    # Cada puntuación del lote coincide con la evaluación de la hija hoja a hoja
+    rng = random.Random(seed)
+    size = rng.choice([5, 7, 11, 13])
+    board = HexBoard(size)
+    for i, idx in enumerate(rng.sample(range(size * size), rng.randrange(size * size // 2))):
+        board.place_piece(idx // size, idx % size, 1 + i % 2)
+    player_id = rng.choice([1, 2])
+    mover = rng.choice([1, 2])
+    player = HexPlayer(player_id)
+    moves = rng.sample(board.get_possible_moves(), min(12, board.empty_count()))
+    expected = []
+    for r, c in moves:
+        board.place_piece(r, c, mover)
+        expected.append(player.evaluate_position(board))
+        board.undo()
+    assert BatchEvaluator.for_size(size).evaluate_children(board, moves, mover, player_id) == expected
@@ -0,0 +1,266 @@
+import sys
+import json
+import math
+import time
+import random
+import inspect
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from player import HexBoard
+
+# Motor por defecto de cada lado: fábrica "módulo:Clase" y opciones
+DEFAULT_ENGINE = "player:HexPlayer"
+
+
+def load_factory(path):
+    # Importa la clase de un jugador a partir de "módulo:Clase"
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def make_player(spec, player_id, max_time, seed):
+    # Crea un jugador; las opciones que no acepta el constructor se fijan como atributos
+    factory = load_factory(spec["factory"])
+    options = dict(spec.get("options", {}))
+    parameters = inspect.signature(factory).parameters
+    options.setdefault("max_time", max_time)
+    if "seed" in parameters:
+        options.setdefault("seed", seed)
+    kwargs = {key: value for key, value in options.items() if key in parameters}
+    player = factory(player_id, **kwargs)
+    for key, value in options.items():
+        if key not in parameters:
+            setattr(player, key, value)
+    return player
+
+
+def random_opening(size, plies, seed):
+    # Apertura reproducible: jugadas alternas al azar sin decidir la partida
+    rng = random.Random(seed)
+    while True:
+        board = HexBoard(size)
+        moves = []
+        player_id = 1
+        for _ in range(plies):
+            move = rng.choice(board.get_possible_moves())
+            board.place_piece(move[0], move[1], player_id)
+            moves.append(move)
+            player_id = 3 - player_id
+        if not board.check_connection(1) and not board.check_connection(2):
+            return moves
+
+
+def play_game(task):
+    # Juega una partida completa en un proceso; devuelve el resultado como diccionario.
+    # Una excepción o una jugada ilegal pierde la partida
+    index, size, engines, first, max_time, opening, seed = task
+    names = (first, "B" if first == "A" else "A")
+    players = {}
+    for player_id, name in zip((1, 2), names):
+        players[player_id] = make_player(engines[name], player_id, max_time, seed * 2 + player_id)
+
+    board = HexBoard(size)
+    player_id = 1
+    for move in opening:
+        board.place_piece(move[0], move[1], player_id)
+        player_id = 3 - player_id
+
+    times = {name: [0.0, 0.0, 0] for name in names}
+    searches = {name: [0, 0, 0] for name in names}
+    winner = None
+    reason = "connection"
+    plies = len(opening)
+    try:
+        while winner is None:
+            player = players[player_id]
+            name = names[player_id - 1]
+            start = time.perf_counter()
+            try:
+                move = player.play(board.clone())
+                move = (int(move[0]), int(move[1]))
+                legal = 0 <= move[0] < size and 0 <= move[1] < size and board.board[move[0]][move[1]] == 0
+            except Exception as error:
+                legal = False
+                reason = f"error: {type(error).__name__}: {error}"
+            elapsed = time.perf_counter() - start
+            spent = times[name]
+            spent[0] += elapsed
+            spent[1] = max(spent[1], elapsed)
+            spent[2] += 1
+            # Profundidad y nodos solo de las jugadas que salieron de la búsqueda
+            if getattr(player, "move_source", "search") == "search" and hasattr(player, "depth_reached"):
+                searched = searches[name]
+                searched[0] += player.depth_reached
+                searched[1] += getattr(player, "nodes", 0)
+                searched[2] += 1
+            if not legal:
+                if reason == "connection":
+                    reason = f"illegal move {move}"
+                winner = names[2 - player_id]
+                break
+            board.place_piece(move[0], move[1], player_id)
+            plies += 1
+            if board.check_connection(player_id):
+                winner = name
+            player_id = 3 - player_id
+    finally:
+        for player in players.values():
+            close = getattr(player, "close", None)
+            if close is not None:
+                close()
+
+    return {
+        "game": index,
+        "size": size,
+        "first": first,
+        "winner": winner,
+        "reason": reason,
+        "plies": plies,
+        "opening": [list(move) for move in opening],
+        # Por motor: tiempo total, jugada más lenta y número de jugadas
+        "time": {name: [round(total, 4), round(slowest, 4), count]
+                 for name, (total, slowest, count) in times.items()},
+        # Por motor: profundidad y nodos medios de las jugadas buscadas
+        "depth": {name: round(depth / count, 2) if count else None
+                  for name, (depth, _, count) in searches.items()},
+        "nodes": {name: nodes // count if count else None
+                  for name, (_, nodes, count) in searches.items()},
+    }
+
+
+def schedule(games, sizes, opening_plies, seed):
+    # Partidas por parejas: misma apertura y tamaño con los colores cambiados
+    rng = random.Random(seed)
+    for pair in range((games + 1) // 2):
+        size = sizes[pair % len(sizes)]
+        opening = random_opening(size, opening_plies, rng.randrange(1 << 30))
+        for first in ("A", "B"):
+            index = 2 * pair + (first == "B")
+            if index < games:
+                yield index, size, first, opening
+
+
+def elo(score):
+    # Diferencia de Elo que corresponde a una puntuación media
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return 400 * math.log10(score / (1 - score))
+
+
+def elo_interval(wins, games, z=1.96):
+    # Elo estimado de A y su intervalo de confianza (sin tablas, el resultado es binomial)
+    if not games:
+        return 0.0, -math.inf, math.inf
+    score = wins / games
+    margin = z * math.sqrt(score * (1 - score) / games)
+    return elo(score), elo(score - margin), elo(score + margin)
+
+
+def sprt_llr(wins, losses, elo0, elo1):
+    # Logaritmo del cociente de verosimilitudes de H1 (elo1) frente a H0 (elo0)
+    p0 = 1 / (1 + 10 ** (-elo0 / 400))
+    p1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+
+
+def sprt_bounds(alpha, beta):
+    # Límites del SPRT: por debajo se acepta H0 y por encima H1
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run_tournament(engines, games, sizes, max_time, workers=2, opening_plies=2, seed=0,
+                   output=None, sprt=None, log=None):
+    # Juega las partidas en un conjunto de procesos y escribe cada resultado como línea
+    # JSON según termina; con sprt=(elo0, elo1, alpha, beta) se para al decidirse
+    tally = {"A": 0, "B": 0}
+    totals = {name: [0.0, 0] for name in engines}
+    decision = None
+    handle = open(output, "a") if output else None
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            pool.submit(play_game, (index, size, engines, first, max_time, opening, seed + index))
+            for index, size, first, opening in schedule(games, sizes, opening_plies, seed)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            tally[result["winner"]] += 1
+            for name, (total, _, count) in result["time"].items():
+                totals[name][0] += total
+                totals[name][1] += count
+            if handle is not None:
+                handle.write(json.dumps(result, separators=(",", ":")) + "\n")
+                handle.flush()
+            played = tally["A"] + tally["B"]
+            if log is not None:
+                estimate, low, high = elo_interval(tally["A"], played)
+                log(f"partida {result['game']} ({result['size']}x{result['size']}, empieza "
+                    f"{result['first']}): gana {result['winner']} en {result['plies']} jugadas | "
+                    f"A {tally['A']} - B {tally['B']}, Elo {estimate:+.0f} [{low:+.0f}, {high:+.0f}]")
+            if sprt is not None:
+                elo0, elo1, alpha, beta = sprt
+                llr = sprt_llr(tally["A"], tally["B"], elo0, elo1)
+                lower, upper = sprt_bounds(alpha, beta)
+                if llr <= lower or llr >= upper:
+                    decision = "H1" if llr >= upper else "H0"
+                    break
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if handle is not None:
+            handle.close()
+
+    played = tally["A"] + tally["B"]
+    estimate, low, high = elo_interval(tally["A"], played)
+    summary = {
+        "games": played,
+        "wins": tally,
+        "elo": estimate,
+        "elo_interval": [low, high],
+        "seconds_per_move": {name: total / count if count else None
+                             for name, (total, count) in totals.items()},
+    }
+    if sprt is not None:
+        summary["llr"] = sprt_llr(tally["A"], tally["B"], sprt[0], sprt[1])
+        summary["sprt_bounds"] = list(sprt_bounds(sprt[2], sprt[3]))
+        summary["sprt"] = decision
+    return summary
+
+
+def _engine(factory, options):
+    # Especificación de un motor a partir de los argumentos de la línea de órdenes
+    return {"factory": factory, "options": json.loads(options) if options else {}}
+
+
+def main(argv=None):
+    # Línea de órdenes: enfrenta dos configuraciones y resume el resultado de A
+    parser = argparse.ArgumentParser(description="Torneo de autojuego entre dos motores de Hex")
+    parser.add_argument("--engine-a", default=DEFAULT_ENGINE, help="módulo:Clase del motor A")
+    parser.add_argument("--options-a", help="opciones JSON de A (argumentos o atributos)")
+    parser.add_argument("--engine-b", default=DEFAULT_ENGINE, help="módulo:Clase del motor B")
+    parser.add_argument("--options-b", help="opciones JSON de B (argumentos o atributos)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11])
+    parser.add_argument("--time", type=float, default=1.0, help="max_time por jugada")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--opening-plies", type=int, default=2,
+                        help="jugadas al azar (con semilla) antes de que jueguen los motores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichero de resultados, una línea JSON por partida")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"),
+                        help="para en cuanto el SPRT acepte H0 (elo0) o H1 (elo1)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    engines = {"A": _engine(args.engine_a, args.options_a), "B": _engine(args.engine_b, args.options_b)}
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+    log = lambda line: print(line, file=sys.stderr, flush=True)
+    summary = run_tournament(engines, args.games, args.sizes, args.time, args.workers,
+                             args.opening_plies, args.seed, args.output, sprt, log)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
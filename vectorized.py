@@ -0,0 +1,171 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from geometry import TOP, BOTTOM, LEFT, RIGHT, GOAL_EDGES, DIRECTIONS, edge_cells, edge_flags
+
+# Distancia infinita de los mapas de distancias (cabe en int32 al sumar uno)
+_INF = 1 << 20
+
+
+def available():
+    # Indica si NumPy está instalado; sin él se evalúa hoja a hoja
+    return np is not None
+
+
+class BatchEvaluator:
+    _evaluators = {}
+
+    @classmethod
+    def for_size(cls, size: int):
+        # Devuelve el evaluador del tamaño dado, creándolo una sola vez
+        evaluator = cls._evaluators.get(size)
+        if evaluator is None:
+            evaluator = cls._evaluators[size] = cls(size)
+        return evaluator
+
+    def __init__(self, size: int):
+        # Precalcula bordes por casilla y las plantillas de borde como matrices de incidencia
+        from patterns import PatternEngine
+        self.size = size
+        n = size * size
+        self.flags = np.array(edge_flags(size), dtype=np.int64)
+        self.target = [None]
+        self.start = [None]
+        self.goals = [None]
+        self.templates = [None]
+        engine = PatternEngine.for_size(size)
+        for player_id in (1, 2):
+            target = np.zeros(n, dtype=bool)
+            target[list(edge_cells(size, player_id, True))] = True
+            self.target.append(target)
+            self.start.append(np.array(edge_cells(size, player_id, False)))
+            self.goals.append([edge for edge in (TOP, BOTTOM, LEFT, RIGHT) if edge & GOAL_EDGES[player_id]])
+            # Plantilla t: casilla de la piedra, borde que alcanza y casillas del portador
+            cells, edges, carriers = [], [], []
+            for idx, found in enumerate(engine.edge_templates[player_id]):
+                for edge, carrier, _ in found:
+                    cells.append(idx)
+                    edges.append(edge)
+                    carriers.append([(carrier >> j) & 1 for j in range(n)])
+            carrier_matrix = np.array(carriers, dtype=np.float32).reshape(len(cells), n)
+            # Por cada borde, qué plantillas lo dan y en qué casilla está su piedra
+            by_edge = []
+            for edge in (TOP, BOTTOM, LEFT, RIGHT):
+                if not edge & GOAL_EDGES[player_id]:
+                    continue
+                placement = np.zeros((len(cells), n), dtype=np.float32)
+                for t, (idx, found_edge) in enumerate(zip(cells, edges)):
+                    if found_edge == edge:
+                        placement[t, idx] = 1
+                by_edge.append((edge, placement))
+            self.templates.append((carrier_matrix.T.copy(), by_edge))
+
+    def _neighbors(self, grid, fill):
+        # Las seis vistas desplazadas de una pila de tableros (K, tamaño, tamaño)
+        size = self.size
+        padded = np.full((len(grid), size + 2, size + 2), fill, dtype=grid.dtype)
+        padded[:, 1:-1, 1:-1] = grid
+        return [padded[:, 1 + dr:1 + dr + size, 1 + dc:1 + dc + size] for dr, dc in DIRECTIONS]
+
+    def _influence(self, own, empty):
+        # Piezas propias más las casillas vacías vecinas de alguna de ellas
+        near = np.zeros_like(own)
+        for view in self._neighbors(own, False):
+            near |= view
+        return (own | (near & empty)).sum(axis=(1, 2))
+
+    def _template_flags(self, own, other, player_id):
+        # Bordes de cada pieza propia: los que toca y los que alcanza por plantilla intacta
+        k = len(own)
+        own_flat = own.reshape(k, -1)
+        flags = np.where(own_flat, self.flags, 0)
+        carrier_matrix, by_edge = self.templates[player_id]
+        intact = ((other.reshape(k, -1).astype(np.float32) @ carrier_matrix) == 0).astype(np.float32)
+        for edge, placement in by_edge:
+            reached = (intact @ placement) > 0
+            flags |= np.where(reached & own_flat, edge, 0)
+        return flags
+
+    def _connectivity(self, own, flags, goals):
+        # Suma por grupo de la bonificación por bordes (reales o por plantilla) y sus piezas;
+        # goals da, por tablero, las dos banderas de borde objetivo
+        size = self.size
+        k = len(own)
+
+        # Propagación de etiqueta mínima y banderas dentro de cada grupo hasta el punto fijo
+        labels = np.where(own, np.arange(size * size).reshape(size, size), _INF)
+        flags = flags.reshape(k, size, size)
+        while True:
+            new_labels = labels
+            new_flags = flags
+            for label_view, flag_view in zip(self._neighbors(labels, _INF), self._neighbors(flags, 0)):
+                new_labels = np.minimum(new_labels, np.where(own, label_view, _INF))
+                new_flags = new_flags | flag_view
+            new_labels = np.where(own, new_labels, _INF)
+            new_flags = np.where(own, new_flags, 0)
+            if np.array_equal(new_labels, labels) and np.array_equal(new_flags, flags):
+                break
+            labels, flags = new_labels, new_flags
+
+        low = goals[:, 0].reshape(k, 1, 1)
+        high = goals[:, 1].reshape(k, 1, 1)
+        roots = own & (labels == np.arange(size * size).reshape(size, size))
+        both = (flags & low != 0) & (flags & high != 0)
+        either = (flags & (low | high)) != 0
+        bonus = np.where(both, 500, np.where(either, 10, 0))
+        return (bonus * roots).sum(axis=(1, 2)) + own.sum(axis=(1, 2))
+
+    def _potential(self, own, empty, target, start):
+        # Distancias al borde objetivo por relajación: las propias cuestan 0 y las vacías 1;
+        # target marca por tablero las casillas del borde objetivo y start las de partida
+        size = self.size
+        k = len(own)
+        cost = np.where(own, 0, np.where(empty, 1, _INF))
+        dist = np.where(target, cost, _INF)
+        while True:
+            best = dist
+            for view in self._neighbors(dist, _INF):
+                best = np.minimum(best, view)
+            new = np.minimum(dist, np.minimum(best + cost, _INF))
+            if np.array_equal(new, dist):
+                break
+            dist = new
+        dist = np.take_along_axis(dist.reshape(k, -1), start, axis=1)
+        path = dist - np.take_along_axis(empty.reshape(k, -1), start, axis=1)
+        counted = (dist < _INF) & (path > 0)
+        return np.where(counted, 2 * size - path, 0).sum(axis=1)
+
+    def evaluate_children(self, board, moves, mover, player_id):
+        # Puntuaciones de evaluate_position, desde el punto de vista de player_id, de las
+        # posiciones que resultan de cada jugada del que mueve, calculadas a la vez
+        size = self.size
+        k = len(moves)
+        cells = np.tile(np.frombuffer(bytes(board._cells), dtype=np.uint8), (k, 1))
+        cells[np.arange(k), [r * size + c for r, c in moves]] = mover
+        cells = cells.reshape(k, size, size)
+        empty = cells == 0
+        opponent_id = 3 - player_id
+        mine = cells == player_id
+        theirs = cells == opponent_id
+
+        # Los dos bandos se apilan en un único lote de 2K tableros: primero el jugador y
+        # después el rival, así cada relajación recorre ambos a la vez
+        own = np.concatenate((mine, theirs))
+        flags = np.concatenate((
+            self._template_flags(mine, theirs, player_id),
+            self._template_flags(theirs, mine, opponent_id),
+        ))
+        sides = (player_id, opponent_id)
+        goals = np.repeat(np.array([self.goals[side] for side in sides]), k, axis=0)
+        target = np.repeat(np.stack([self.target[side] for side in sides]), k, axis=0)
+        start = np.repeat(np.stack([self.start[side] for side in sides]), k, axis=0)
+        both_empty = np.concatenate((empty, empty))
+
+        totals = (
+            self._influence(own, both_empty)
+            + self._connectivity(own, flags, goals)
+            + self._potential(own, both_empty, target.reshape(2 * k, size, size), start)
+        )
+        return [int(value) for value in totals[:k] - totals[k:]]